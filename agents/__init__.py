@@ -2,19 +2,26 @@
 
 This package contains all the specialized agents for the autonomous test
 suite generation system, organized according to Google ADK best practices.
+
+Agents are imported lazily on first attribute access, so ``import agents`` does
+not load ADK or build any agent until one is actually used.
 """
 
-# Import all agents for backward compatibility
-from .code_analyzer import code_analyzer_agent
-from .coverage_analyzer import coverage_analyzer_agent
-from .selective_test_runner import selective_test_runner_agent
-from .debugger_and_refiner import debugger_and_refiner_agent
-from .report_generator import report_generator_agent
-from .result_summarizer import result_summarizer_agent
-from .incremental_test_implementer import incremental_test_implementer_agent
-from .scenario_coverage_designer import scenario_coverage_designer_agent
-# Import new two-stage coordinator
-from .agent import root_agent
+import importlib
+
+# Attribute name -> submodule providing it, kept for backward compatibility
+_LAZY_ATTRIBUTES = {
+    'code_analyzer_agent': '.code_analyzer',
+    'coverage_analyzer_agent': '.coverage_analyzer',
+    'selective_test_runner_agent': '.selective_test_runner',
+    'debugger_and_refiner_agent': '.debugger_and_refiner',
+    'report_generator_agent': '.report_generator',
+    'result_summarizer_agent': '.result_summarizer',
+    'incremental_test_implementer_agent': '.incremental_test_implementer',
+    'scenario_coverage_designer_agent': '.scenario_coverage_designer',
+    # New two-stage coordinator
+    'root_agent': '.agent',
+}
 
 __all__ = [
     'code_analyzer_agent',
@@ -28,3 +35,9 @@ __all__ = [
     'root_agent'
 ]
 
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
@@ -3,56 +3,96 @@
 This module orchestrates the new two-stage autonomous test suite generation system.
 """
 
-import json
+import asyncio
+import functools
+import orjson
 import re
 import logging
-from google.adk.agents import LlmAgent, SequentialAgent, LoopAgent
+from types import MappingProxyType
+from google.adk.agents import SequentialAgent, LoopAgent
 from google.adk.agents.callback_context import CallbackContext
-from google.adk.tools.tool_context import ToolContext
-from google.adk.tools.base_tool import BaseTool
-from google.genai import types
 
-# Import agent creation functions to avoid sharing agent instances
-from .code_analyzer.agent import create_code_analyzer_agent
-from .report_generator.agent import create_report_generator_agent
-from .result_summarizer.agent import create_result_summarizer_agent
-
-# Import new Stage 1 agent creation functions
-from .scenario_coverage_designer.agent import scenario_coverage_designer_agent as create_scenario_coverage_designer
-from .coverage_validator.agent import coverage_validator_agent as create_coverage_validator
-# Import new Stage 2 agents and tools
-from .incremental_test_implementer.agent import incremental_test_implementer_agent as create_incremental_test_implementer
-from .selective_test_runner.agent import selective_test_runner_agent as create_selective_test_runner
-
-# Import exit_loop tool
-from .coverage_loop_controller.tools import exit_loop
+# Agent packages expose one shared, lazily built instance of each agent
+from . import (
+    code_analyzer,
+    scenario_coverage_designer,
+    coverage_validator,
+    incremental_test_implementer,
+    selective_test_runner,
+    report_generator,
+    result_summarizer,
+)
+# Re-exported for callers that still import the callback from the coordinator
+from .code_analyzer.agent import save_analysis_to_state
+from .utils.lazy_agents import lazy_agent_getattr
 
 # Import configuration
 from .config import COVERAGE_MAX_ITERATIONS, EXECUTION_MAX_ITERATIONS
 
 logger = logging.getLogger("two_stage_system")
 
-def save_source_load_to_local(callback_context: CallbackContext):
+# GitHub pull request URLs accepted as the source of the code under test
+_PR_URL_RE = re.compile(r'^https://github\.com/[^/]+/[^/]+/pull/\d+$')
+
+# Default state variables for the two-stage architecture, shared read-only by all
+# sessions; containers are given as factories so each session gets its own.
+_TWO_STAGE_DEFAULTS = MappingProxyType({
+    'static_analysis_report': dict,
+
+    # Stage 1 state variables
+    'coverage_focused_scenarios': list,
+    'coverage_validation_result': dict,
+    'coverage_loop_decision': dict,
+    'coverage_history': list,
+    'stage1_complete': False,
+
+    # Stage 2 state variables
+    'test_status_tracking': dict,
+    'incremental_test_implementation': dict,
+    'selective_test_results': dict,
+    'execution_loop_decision': dict,
+    'exec_success_history': list,
+    'stage2_complete': False,
+
+    # Final artifacts
+    'comprehensive_report': dict,
+    'generated_test_code': '',
+
+    # Iteration counters
+    'coverage_iteration': 0,
+    'execution_iteration': 0,
+})
+
+# Loop histories describe a single run, so each new run starts them empty instead of
+# inheriting the previous run's readings
+_PER_RUN_HISTORIES = ('coverage_history', 'exec_success_history')
+
+
+async def save_source_load_to_local(callback_context: CallbackContext):
+    """Saves the source code from GCS or GitHub to local state and filesystem.
+
+    Downloads and git operations run in a worker thread so they don't block
+    the event loop shared by other sessions.
+    """
     from .utils.gcs_bucket import get_file_from_gcs
     from .utils.github import get_changed_file_from_pr
     import os
     import tempfile
     from urllib.parse import urlparse
-    """Saves the source code from GCS or GitHub to local state and filesystem."""
     user_content = callback_context.user_content
     if user_content and user_content.parts:
         try:
             text = user_content.parts[0].text
             if text:
-                if re.match(r'^gs://', text):
+                if text.startswith('gs://'):
                     gcs_url = text.strip()
-                    source_code = get_file_from_gcs(gcs_url)
+                    source_code = await asyncio.to_thread(get_file_from_gcs, gcs_url)
                     callback_context.state['source_code_path'] = source_code
                     callback_context.state['language'] = 'python'
                     logger.info(f"Loaded source code from GCS URL: {gcs_url}")
-                elif re.match(r'^https://github\.com/[^/]+/[^/]+/pull/\d+$', text):
+                elif _PR_URL_RE.match(text):
                     pr_url = text.strip()
-                    source_code = get_changed_file_from_pr(pr_url)
+                    source_code = await asyncio.to_thread(get_changed_file_from_pr, pr_url)
                     callback_context.state['source_code_path'] = source_code
                     callback_context.state['language'] = 'python'
                     # Store PR URL and project directory for later use
@@ -66,132 +106,83 @@ def save_source_load_to_local(callback_context: CallbackContext):
                         callback_context.state['test_filename'] = filename_without_ext + "_test.py"
                     logger.info(f"Downloaded source code from GitHub PR: {pr_url}")
                 else:
-                    initial_data = json.loads(text)
+                    initial_data = orjson.loads(text)
                     callback_context.state['language'] = initial_data.get('language')
                     # Set source_code_path from the provided source_code
                     if 'source_code' in initial_data:
                         callback_context.state['source_code_path'] = initial_data['source_code']
-        except (json.JSONDecodeError, AttributeError):
+        except (orjson.JSONDecodeError, AttributeError):
             logger.warning("Could not parse initial JSON request. Treating content as raw source code.")
             callback_context.state['language'] = 'python'
 
 def initialize_two_stage_state(callback_context: CallbackContext):
     """Initialize state for the two-stage architecture."""
-    # Initialize state variables for two-stage architecture
-    state_initializers = {
-        'static_analysis_report': {},
-
-        # Stage 1 state variables
-        'coverage_focused_scenarios': [],
-        'coverage_validation_result': {},
-        'coverage_loop_decision': {},
-        'stage1_complete': False,
-
-        # Stage 2 state variables
-        'test_status_tracking': {},
-        'incremental_test_implementation': {},
-        'selective_test_results': {},
-        'execution_loop_decision': {},
-        'stage2_complete': False,
-
-        # Final artifacts
-        'comprehensive_report': {},
-        'generated_test_code': '',
-
-        # Iteration counters
-        'coverage_iteration': 0,
-        'execution_iteration': 0,
+    # Only keys the session doesn't already hold are written, plus the per-run
+    # histories, in one bulk update. Immutable defaults are shared; containers are
+    # built only for missing keys.
+    state = callback_context.state
+    missing_defaults = {
+        key: default() if callable(default) else default
+        for key, default in _TWO_STAGE_DEFAULTS.items()
+        if state.get(key) is None
     }
-    for key, default_value in state_initializers.items():
-        if callback_context.state.get(key) is None:
-            callback_context.state[key] = default_value
+    missing_defaults.update((key, []) for key in _PER_RUN_HISTORIES)
+    state.update(missing_defaults)
 
     logger.info("Two-stage architecture state initialized")
-    print(f"Initialized state: {callback_context.state.to_dict()}")
-
-
-def save_analysis_to_state(tool: BaseTool, args: dict, tool_context: ToolContext, tool_response: dict):
-    """Save code analysis results directly to state."""
-    if tool.name == 'analyze_code_structure':
-        tool_context.state['static_analysis_report'] = tool_response
-        print(f"Saved analysis result to state: {tool_response}")
-        return tool_response
-
-
-# Create fresh agent instances for the two-stage system
-code_analyzer_agent = create_code_analyzer_agent()
-report_generator_agent = create_report_generator_agent()
-result_summarizer_agent = create_result_summarizer_agent()
-
-# Create Stage 1 agent instances (imported as aliases)
-scenario_coverage_designer_agent = create_scenario_coverage_designer
-coverage_validator_agent = create_coverage_validator
-
-# Create Stage 2 agent instances (imported as aliases)
-incremental_test_implementer_agent = create_incremental_test_implementer
-selective_test_runner_agent = create_selective_test_runner
-
-# Configure the code analyzer
-code_analyzer_agent.after_tool_callback = save_analysis_to_state
-
-# Configure Stage 1 agents
-scenario_coverage_designer_agent.instruction += "\n\nYou will receive the static analysis report in the `{static_analysis_report}` state variable."
-
-coverage_validator_agent.instruction += "\n\nYou will receive the coverage scenarios in the `{coverage_focused_scenarios}` state variable, static analysis in the `{static_analysis_report}` state variable, and current iteration count in the `{coverage_iteration}` state variable."
-
-# Configure Stage 2 agents
-incremental_test_implementer_agent.instruction += "\n\nYou will receive the test scenarios in the `{coverage_focused_scenarios}` state variable."
-
-selective_test_runner_agent.instruction += "\n\nYou will receive the test suite in the `{generated_test_code}` state variable and source code in the path `{source_code_path}`, use read_file_as_string tool to get the source code."
-
-# Configure final reporting agents (reused from existing system)
-report_generator_agent.instruction += "\n\nYou will receive coverage report in `{coverage_validation_result}`, test results in `{selective_test_results}`, source code in `{source_code_path}`, and generated test code in `{generated_test_code}`."
-
-# result_summarizer_agent.instruction += "\n\nYou will receive the comprehensive report in `{comprehensive_report}` and final test suite in `{generated_test_code}`."
-
-# --- Stage 1: Coverage Optimization Loop ---
-
-# Create the coverage optimization loop with integrated validation and control
-coverage_optimization_loop = LoopAgent(
-    name="CoverageOptimizationLoop",
-    description="Stage 1: Optimizes test scenarios to achieve maximum code coverage",
-    sub_agents=[
-        scenario_coverage_designer_agent,
-        coverage_validator_agent  # Now includes loop control logic
-    ],
-    max_iterations=COVERAGE_MAX_ITERATIONS
-)
-
-# --- Stage 2: Execution Quality Loop ---
-
-# Simplified Stage 2: Direct test implementation and execution
-stage2_test_implementation = SequentialAgent(
-    name="Stage2TestImplementation",
-    description="Stage 2: Convert scenarios to executable tests and run them",
-    sub_agents=[
-        incremental_test_implementer_agent,
-        selective_test_runner_agent
-    ]
-)
-
-# --- Complete Two-Stage System ---
-
-two_stage_system = SequentialAgent(
-    name="TwoStageTestGeneration",
-    description="Complete two-stage test generation system with coverage optimization and test implementation",
-    sub_agents=[
-        code_analyzer_agent,              # Initial code analysis
-        coverage_optimization_loop,       # Stage 1: Coverage optimization
-        stage2_test_implementation,       # Stage 2: Test implementation and execution
-        report_generator_agent,          # Final reporting
-        result_summarizer_agent          # Final output formatting
-    ]
-)
-
-# The root agent for the two-stage architecture
-root_agent = SequentialAgent(
-    name="TwoStageCoordinator",
-    description="The master coordinator for the two-stage autonomous test suite generation system",
-    sub_agents=[two_stage_system],
-    before_agent_callback=[save_source_load_to_local, initialize_two_stage_state]
-)
+    logger.debug("Initialized state: %s", state.to_dict())
+
+
+async def initialize_two_stage_session(callback_context: CallbackContext):
+    """Loads the source under test and initializes the two-stage state in one callback."""
+    await save_source_load_to_local(callback_context)
+    initialize_two_stage_state(callback_context)
+
+
+@functools.cache
+def _build_root() -> SequentialAgent:
+    """Assembles the two-stage agent tree once from the shared agent instances."""
+    # --- Stage 1: Coverage Optimization Loop ---
+
+    # Create the coverage optimization loop with integrated validation and control
+    coverage_optimization_loop = LoopAgent(
+        name="CoverageOptimizationLoop",
+        description="Stage 1: Optimizes test scenarios to achieve maximum code coverage",
+        sub_agents=[
+            scenario_coverage_designer.scenario_coverage_designer_agent,
+            coverage_validator.coverage_validator_agent  # Now includes loop control logic
+        ],
+        max_iterations=COVERAGE_MAX_ITERATIONS
+    )
+
+    # --- Stage 2: Execution Quality Loop ---
+
+    # Simplified Stage 2: Direct test implementation and execution
+    stage2_test_implementation = SequentialAgent(
+        name="Stage2TestImplementation",
+        description="Stage 2: Convert scenarios to executable tests and run them",
+        sub_agents=[
+            incremental_test_implementer.incremental_test_implementer_agent,
+            selective_test_runner.selective_test_runner_agent
+        ]
+    )
+
+    # --- Complete Two-Stage System ---
+
+    # The root agent for the two-stage architecture runs the stages directly
+    return SequentialAgent(
+        name="TwoStageCoordinator",
+        description="The master coordinator for the two-stage autonomous test suite generation system",
+        sub_agents=[
+            code_analyzer.code_analyzer_agent,                # Initial code analysis
+            coverage_optimization_loop,                       # Stage 1: Coverage optimization
+            stage2_test_implementation,                       # Stage 2: Test implementation and execution
+            report_generator.report_generator_agent,          # Final reporting
+            result_summarizer.result_summarizer_agent         # Final output formatting
+        ],
+        before_agent_callback=initialize_two_stage_session
+    )
+
+
+# The root agent is built on first access rather than at import time
+__getattr__ = lazy_agent_getattr(__name__, root_agent=_build_root)
@@ -3,7 +3,7 @@
 This package contains the code analyzer agent and its associated tools.
 """
 
-from .agent import code_analyzer_agent, create_code_analyzer_agent
+from .agent import create_code_analyzer_agent, __getattr__
 
 __all__ = ['code_analyzer_agent', 'create_code_analyzer_agent']
 
@@ -4,9 +4,31 @@ This agent performs deep, accurate static analysis of source code by parsing it
 into a structured format using AST analysis.
 """
 
+import inspect
+import logging
 from google.adk.agents import LlmAgent
+from google.adk.tools.tool_context import ToolContext
+from google.adk.tools.base_tool import BaseTool
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import analyze_code_structure
-from ..tools.workflow_tools import read_file_as_string
+from ..tools.workflow_tools import read_files_as_strings
+
+logger = logging.getLogger(__name__)
+
+
+def save_analysis_to_state(tool: BaseTool, args: dict, tool_context: ToolContext, tool_response: dict):
+    """
+    Save code analysis results directly to state and end the agent's turn.
+
+    Skipping summarization avoids a second LLM call just to restate the report,
+    and only a short acknowledgement re-enters the conversation history.
+    """
+    if tool.name == 'analyze_code_structure':
+        tool_context.state['static_analysis_report'] = tool_response
+        tool_context.actions.skip_summarization = True
+        logger.debug("Saved analysis result to state: %s", tool_response)
+        return {"status": tool_response.get("status"), "message": "Static analysis complete."}
+
 
 def create_code_analyzer_agent() -> LlmAgent:
     """Creates and returns a configured Code Analyzer agent."""
@@ -14,18 +36,18 @@ def create_code_analyzer_agent() -> LlmAgent:
         name="CodeAnalyzer",
         description="Performs deep, accurate static analysis of source code by parsing it into a structured format.",
         model="gemini-2.5-flash",
-        instruction="""
-        You are a specialized agent for static code analysis. Your sole responsibility is to read_file_as_string on a list of source code file paths in {source_code_path} and call the `analyze_code_structure` tool with the `read_file_as_string` result as source_code and python as the language.
+        instruction=inspect.cleandoc("""
+        You are a specialized agent for static code analysis. Your sole responsibility is to call `read_files_as_strings` once with the list of source code file paths in {source_code_path} and call the `analyze_code_structure` tool with the returned file contents as source_code and python as the language.
         You must correctly identify the programming language from the user's request or file context and pass both the language and the source code to the tool.
         Do NOT attempt to analyze, summarize, or explain the code yourself. Only call the tool.
-        """,
+        """),
         tools=[
             analyze_code_structure,
-            read_file_as_string
-        ]
+            read_files_as_strings
+        ],
+        after_tool_callback=save_analysis_to_state
     )
 
 
-# Create the agent instance for backward compatibility
-code_analyzer_agent = create_code_analyzer_agent()
-
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, code_analyzer_agent=create_code_analyzer_agent)
@@ -1,50 +1,62 @@
 import ast
+import hashlib
+import logging
+import orjson
 from typing import Any, Dict, List, Union
+from ..utils.ast_cache import parse_source
 
-# This class is a visitor that walks the Abstract Syntax Tree (AST) of the Python code.
-class CodeVisitor(ast.NodeVisitor):
+logger = logging.getLogger(__name__)
+
+# Analysis results keyed by a digest of the source, so repeated calls on the same
+# file (e.g. across coverage loop iterations) skip parsing and walking the AST.
+# Stored serialized so every caller gets its own freshly decoded copy.
+_AST_CACHE: Dict[bytes, bytes] = {}
+_AST_CACHE_SIZE = 32
+
+# This class walks the Abstract Syntax Tree (AST) of the Python code.
+class CodeVisitor:
     """
-    Visits nodes in an AST to extract information about classes and functions.
+    Walks an AST to extract information about classes and functions.
     """
     def __init__(self):
         self.structure: List[Dict[str, Any]] = []
-        self._class_stack = []  # Track nested classes
 
-    def visit_ClassDef(self, node: ast.ClassDef):
-        """Called when the visitor finds a class definition."""
-        class_info = {
-            "type": "class",
-            "name": node.name,
-            "docstring": ast.get_docstring(node),
-            "methods": []
-        }
-        
-        # Add to class stack to track we're inside a class
-        self._class_stack.append(node.name)
-        
-        # Iterate through the body of the class to find method definitions
-        for item in node.body:
-            if isinstance(item, ast.FunctionDef):
-                method_info = self._get_function_details(item)
-                class_info["methods"].append(method_info)
-        
-        self.structure.append(class_info)
-        
-        # Remove from class stack when leaving the class
-        self._class_stack.pop()
-
-    def visit_FunctionDef(self, node: ast.FunctionDef):
+    def walk(self, tree: ast.AST):
         """
-        Called when the visitor finds a function definition.
-        Only processes top-level functions (not methods inside classes).
+        Walks the tree with an explicit stack instead of recursive visitor dispatch.
+
+        Class bodies are scanned directly for methods and function bodies are not
+        entered, so only top-level functions are reported as functions. Nodes are
+        visited in source order, as a recursive ``ast.NodeVisitor`` would.
         """
-        # Only add functions that are not inside any class
-        if not self._class_stack:
-            func_info = self._get_function_details(node)
-            func_info["type"] = "function"
-            self.structure.append(func_info)
+        ClassDef = ast.ClassDef
+        function_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+        iter_child_nodes = ast.iter_child_nodes
+        get_function_details = self._get_function_details
+        append_structure = self.structure.append
 
-    def _get_function_details(self, node: ast.FunctionDef) -> Dict[str, Any]:
+        stack = [tree]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            node = pop()
+            if isinstance(node, ClassDef):
+                append_structure({
+                    "type": "class",
+                    "name": node.name,
+                    "docstring": ast.get_docstring(node),
+                    # Only the class body is scanned for method definitions
+                    "methods": [get_function_details(item) for item in node.body if isinstance(item, function_types)]
+                })
+            elif isinstance(node, function_types):
+                func_info = get_function_details(node)
+                func_info["type"] = "function"
+                append_structure(func_info)
+            else:
+                # Reversed so the next pop continues with the first child
+                extend(reversed(list(iter_child_nodes(node))))
+
+    def _get_function_details(self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> Dict[str, Any]:
         """Helper to extract details from any function or method node."""
         return {
             "name": node.name,
@@ -52,14 +64,34 @@ class CodeVisitor(ast.NodeVisitor):
             "parameters": [
                 {
                     "name": arg.arg,
-                    # ast.unparse is a clean way to get the string representation of a type hint
-                    "annotation": ast.unparse(arg.annotation) if arg.annotation else None
+                    "annotation": _annotation_to_str(arg.annotation) if arg.annotation else None
                 }
                 for arg in node.args.args
             ],
-            "return_type": ast.unparse(node.returns) if node.returns else None
+            "return_type": _annotation_to_str(node.returns) if node.returns else None
         }
 
+
+def _annotation_to_str(annotation: ast.expr) -> str:
+    """
+    Returns the source text of a type hint.
+
+    Plain names (``int``) and dotted names (``typing.Any``) are by far the most
+    common hints and are built directly; anything else falls back to ast.unparse,
+    which sets up a full unparser for every call.
+    """
+    if isinstance(annotation, ast.Name):
+        return annotation.id
+    parts = []
+    node = annotation
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if parts and isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return ast.unparse(annotation)
+
 def analyze_code_structure(source_code: str, language: str) -> Dict[str, Any]:
     """
     Parses source code into a structured JSON representation of its AST.
@@ -75,14 +107,24 @@ def analyze_code_structure(source_code: str, language: str) -> Dict[str, Any]:
         A JSON-serializable dictionary representing the code structure.
     """
     if language.lower() == 'python':
+        key = hashlib.blake2b(source_code.encode(), digest_size=16).digest()
+        cached = _AST_CACHE.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
         try:
-            print(f"Analyzing Python code structure...{source_code[:500]}...")  # Print first 30 chars for context
-            tree = ast.parse(source_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Analyzing Python code structure...%s...", source_code[:500])
+            tree = parse_source(source_code)
             visitor = CodeVisitor()
-            visitor.visit(tree)
-            return {"status": "success", "structure": visitor.structure}
+            visitor.walk(tree)
+            result = {"status": "success", "structure": visitor.structure}
         except SyntaxError as e:
-            return {"status": "error", "message": f"Python syntax error: {e}"}
+            result = {"status": "error", "message": f"Python syntax error: {e}"}
+        if len(_AST_CACHE) >= _AST_CACHE_SIZE:
+            # Evict the oldest entry
+            del _AST_CACHE[next(iter(_AST_CACHE))]
+        _AST_CACHE[key] = orjson.dumps(result)
+        return result
     
     elif language.lower() == 'java':
         # Placeholder for Java parsing logic using a library like javalang or py-javaparser
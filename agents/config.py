@@ -4,10 +4,17 @@
 COVERAGE_MAX_ITERATIONS = 5      # Maximum iterations for coverage optimization
 COVERAGE_TARGET = 100            # Target coverage percentage (100% = full coverage)
 MIN_COVERAGE_THRESHOLD = 80      # Minimum acceptable coverage to proceed to Stage 2
+COVERAGE_PLATEAU_WINDOW = 3      # Iterations compared when detecting a coverage plateau
+COVERAGE_PLATEAU_MIN_GAIN = 1.0  # Coverage gain (percentage points) over the window below which coverage has plateaued
+COVERAGE_PLATEAU_MAX_STDEV = 2.0 # Maximum spread within the window for a plateau, so oscillation isn't mistaken for one
 
 # Stage 2: Execution Quality Loop Configuration  
 EXECUTION_MAX_ITERATIONS = 10    # Maximum iterations for execution quality improvement
 EXECUTION_SUCCESS_THRESHOLD = 95 # Target execution success rate percentage
+EXECUTION_STAGNATION_WINDOW = 3  # Iterations compared when detecting a stagnant success rate
+EXECUTION_STAGNATION_TOL = 1.0   # Success rate spread (percentage points) over the window below which the loop has stagnated
+EXECUTION_STAGNATION_MIN_GAIN = 0.01  # Relative median gain between consecutive windows below which progress has stalled
+EXECUTION_STAGNATION_MAX_CV = 0.02    # Maximum stdev/median within the latest window, so noisy retries aren't mistaken for convergence
 
 # General Configuration
 DEFAULT_TEST_FRAMEWORK = "pytest"
@@ -3,6 +3,6 @@
 This package contains the coverage analyzer agent for measuring test coverage.
 """
 
-from .agent import coverage_analyzer_agent, create_coverage_analyzer_agent
+from .agent import create_coverage_analyzer_agent, __getattr__
 
 __all__ = ['coverage_analyzer_agent', 'create_coverage_analyzer_agent']
@@ -3,8 +3,10 @@
 This agent analyzes test coverage and provides coverage metrics.
 """
 
+import inspect
 import logging
 from google.adk.agents import LlmAgent
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import calculate_coverage
 from ..tools.workflow_tools import read_file_as_string
 
@@ -19,7 +21,7 @@ def create_coverage_analyzer_agent() -> LlmAgent:
         name="CoverageAnalyzer",
         description="Analyzes test coverage and provides detailed coverage metrics.",
         model="gemini-2.5-pro",
-        instruction="""
+        instruction=inspect.cleandoc("""
         You are a test coverage analysis expert. Your task is to analyze the coverage of generated test scenarios.
 
         You will receive:
@@ -34,9 +36,9 @@ def create_coverage_analyzer_agent() -> LlmAgent:
         
         Your output should be a JSON object containing the coverage analysis results.
         Focus on providing actionable insights about coverage gaps and suggestions for improvement.
-        """,
+        """),
         tools=[read_file_as_string, calculate_coverage]
     )
 
-# Create the agent instance
-coverage_analyzer_agent = create_coverage_analyzer_agent()
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, coverage_analyzer_agent=create_coverage_analyzer_agent)
@@ -4,13 +4,29 @@ This module provides tools for calculating test coverage metrics.
 """
 
 import ast
+import hashlib
 import re
 import logging
+import orjson
+from collections import defaultdict
 from typing import Dict, List, Set, Any
+from ..utils.ast_cache import parse_source
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Testable units keyed by a digest of the source, so the coverage loop doesn't
+# re-parse an unchanged file on every iteration. Stored serialized so every caller
+# gets its own freshly decoded copy.
+_UNITS_CACHE: Dict[bytes, bytes] = {}
+_UNITS_CACHE_SIZE = 32
+
+# Identifiers mentioned in a scenario description, e.g. `add`, `Calculator`, `__init__`
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Shared stand-in for a class with no covered methods
+_NO_METHODS = frozenset()
+
 class CoverageAnalyzer:
     """Analyzes code coverage from source code and test scenarios."""
     
@@ -18,51 +34,123 @@ class CoverageAnalyzer:
         self.functions = set()
         self.classes = set()
         self.methods = {}  # class_name -> [method_names]
+        self._method_count = 0  # Total across self.methods, maintained while visiting
         
     def extract_testable_units(self, source_code: str) -> Dict[str, Any]:
         """Extract all testable units from source code."""
         logger.info("Extracting testable units from source code")
-        
+
+        key = hashlib.blake2b(source_code.encode(), digest_size=16).digest()
+        cached = _UNITS_CACHE.get(key)
+        if cached is not None:
+            logger.debug("Reusing cached testable units")
+            cached = orjson.loads(cached)
+            if "error" not in cached:
+                self.functions = set(cached["functions"])
+                self.classes = set(cached["classes"])
+                self.methods = {name: list(methods) for name, methods in cached["methods"].items()}
+                self._method_count = cached["total_units"] - len(self.functions) - len(self.classes)
+            return cached
+
+        result = self._extract_testable_units(source_code)
+        if len(_UNITS_CACHE) >= _UNITS_CACHE_SIZE:
+            # Evict the oldest entry
+            del _UNITS_CACHE[next(iter(_UNITS_CACHE))]
+        _UNITS_CACHE[key] = orjson.dumps(result)
+        return result
+
+    def _extract_testable_units(self, source_code: str) -> Dict[str, Any]:
+        """Parse the source and collect its testable units."""
         try:
-            tree = ast.parse(source_code)
+            tree = parse_source(source_code)
             self._visit_node(tree)
             
             result = {
                 "functions": list(self.functions),
                 "classes": list(self.classes),
                 "methods": dict(self.methods),
-                "total_units": len(self.functions) + len(self.classes) + sum(len(methods) for methods in self.methods.values())
+                "total_units": len(self.functions) + len(self.classes) + self._method_count
             }
             
-            logger.info(f"Found {result['total_units']} testable units: {len(self.functions)} functions, {len(self.classes)} classes, {sum(len(methods) for methods in self.methods.values())} methods")
+            logger.info(f"Found {result['total_units']} testable units: {len(self.functions)} functions, {len(self.classes)} classes, {self._method_count} methods")
             return result
             
         except SyntaxError as e:
             logger.error(f"Syntax error in source code: {e}")
             return {"error": f"Syntax error: {e}"}
     
-    def _visit_node(self, node):
-        """Visit AST nodes to extract testable units."""
-        if isinstance(node, ast.FunctionDef):
-            # Top-level function
-            if not hasattr(node, '_parent_class'):
+    def _visit_node(self, tree):
+        """
+        Extract testable units from the module body and the bodies of its classes.
+
+        Function bodies are never entered, so only top-level functions and the
+        direct methods of top-level classes are visited.
+        """
+        function_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+        for node in tree.body:
+            if isinstance(node, function_types):
                 self.functions.add(node.name)
                 logger.debug(f"Found function: {node.name}")
-        
-        elif isinstance(node, ast.ClassDef):
-            self.classes.add(node.name)
-            self.methods[node.name] = []
-            logger.debug(f"Found class: {node.name}")
-            
-            # Find methods in this class
-            for item in node.body:
-                if isinstance(item, ast.FunctionDef):
-                    self.methods[node.name].append(item.name)
-                    logger.debug(f"Found method: {node.name}.{item.name}")
-        
-        # Continue visiting child nodes
-        for child in ast.iter_child_nodes(node):
-            self._visit_node(child)
+
+            elif isinstance(node, ast.ClassDef):
+                self.classes.add(node.name)
+                # A redefined class replaces the methods counted for the earlier one
+                self._method_count -= len(self.methods.get(node.name, ()))
+                methods = self.methods[node.name] = []
+                logger.debug(f"Found class: {node.name}")
+
+                # Find methods in this class
+                for item in node.body:
+                    if isinstance(item, function_types):
+                        methods.append(item.name)
+                        self._method_count += 1
+                        logger.debug(f"Found method: {node.name}.{item.name}")
+
+def _scenario_coverage(testable_units: Dict[str, Any], test_scenarios: List[Dict[str, str]]):
+    """
+    Match test scenarios against the testable units of a source file.
+
+    The units come from the per-source cache, so across coverage loop iterations
+    this is the only part of `calculate_coverage` that is recomputed.
+
+    Returns:
+        The covered functions, covered classes and covered methods per class.
+    """
+    covered_functions = set()
+    covered_classes = set()
+    covered_methods = defaultdict(set)
+
+    # Lowercase every unit name once; scenarios are then matched by identifier lookups
+    lc_functions = {func_name.lower(): func_name for func_name in testable_units['functions']}
+    lc_classes = {class_name.lower(): class_name for class_name in testable_units['methods']}
+    lc_methods = {}  # lowercased method name -> [(class_name, method_name)]
+    for class_name, methods in testable_units['methods'].items():
+        for method_name in methods:
+            lc_methods.setdefault(method_name.lower(), []).append((class_name, method_name))
+
+    for scenario in test_scenarios:
+        description = scenario.get('description', '').lower()
+        tokens = set(_IDENTIFIER_RE.findall(description))
+
+        # Simple pattern matching to identify what's being tested
+        # Look for function names
+        for token in tokens & lc_functions.keys():
+            func_name = lc_functions[token]
+            covered_functions.add(func_name)
+            logger.debug(f"Scenario covers function: {func_name}")
+
+        # Look for class and method names
+        for token in tokens & lc_classes.keys():
+            class_name = lc_classes[token]
+            covered_classes.add(class_name)
+            logger.debug(f"Scenario covers class: {class_name}")
+
+        for token in tokens & lc_methods.keys():
+            for class_name, method_name in lc_methods[token]:
+                covered_methods[class_name].add(method_name)
+                logger.debug(f"Scenario covers method: {class_name}.{method_name}")
+
+    return covered_functions, covered_classes, covered_methods
 
 def calculate_coverage(source_code: str, test_scenarios: List[Dict[str, str]]) -> Dict[str, Any]:
     """
@@ -84,34 +172,9 @@ def calculate_coverage(source_code: str, test_scenarios: List[Dict[str, str]]) -
     if "error" in testable_units:
         return testable_units
     
-    # Analyze test scenario coverage
-    covered_functions = set()
-    covered_classes = set()
-    covered_methods = {}
-    
-    for scenario in test_scenarios:
-        description = scenario.get('description', '').lower()
-        
-        # Simple pattern matching to identify what's being tested
-        # Look for function names
-        for func_name in testable_units['functions']:
-            if func_name.lower() in description or f"'{func_name}'" in description:
-                covered_functions.add(func_name)
-                logger.debug(f"Scenario covers function: {func_name}")
-        
-        # Look for class and method names
-        for class_name, methods in testable_units['methods'].items():
-            if class_name.lower() in description or f"'{class_name}'" in description:
-                covered_classes.add(class_name)
-                logger.debug(f"Scenario covers class: {class_name}")
-            
-            for method_name in methods:
-                if method_name.lower() in description or f"'{method_name}'" in description:
-                    if class_name not in covered_methods:
-                        covered_methods[class_name] = set()
-                    covered_methods[class_name].add(method_name)
-                    logger.debug(f"Scenario covers method: {class_name}.{method_name}")
-    
+    # Only the scenario matching depends on this call's scenarios
+    covered_functions, covered_classes, covered_methods = _scenario_coverage(testable_units, test_scenarios)
+
     # Calculate coverage percentages
     function_coverage = len(covered_functions) / len(testable_units['functions']) if testable_units['functions'] else 1.0
     class_coverage = len(covered_classes) / len(testable_units['classes']) if testable_units['classes'] else 1.0
@@ -126,15 +189,16 @@ def calculate_coverage(source_code: str, test_scenarios: List[Dict[str, str]]) -
     overall_coverage = total_covered / total_testable if total_testable > 0 else 1.0
     
     # Identify gaps
-    uncovered_functions = set(testable_units['functions']) - covered_functions
-    uncovered_classes = set(testable_units['classes']) - covered_classes
+    # Filter the unit lists directly rather than converting each one to a set first
+    uncovered_functions = {name for name in testable_units['functions'] if name not in covered_functions}
+    uncovered_classes = {name for name in testable_units['classes'] if name not in covered_classes}
     uncovered_methods = {}
     for class_name, methods in testable_units['methods'].items():
-        covered_for_class = covered_methods.get(class_name, set())
-        uncovered_for_class = set(methods) - covered_for_class
+        covered_for_class = covered_methods.get(class_name, _NO_METHODS)
+        uncovered_for_class = {name for name in methods if name not in covered_for_class}
         if uncovered_for_class:
             uncovered_methods[class_name] = list(uncovered_for_class)
-    
+
     result = {
         "coverage_summary": {
             "overall_coverage": round(overall_coverage * 100, 2),
@@ -4,11 +4,12 @@ This module contains the agent responsible for controlling the coverage optimiza
 in Stage 1 of the two-stage architecture.
 """
 
-from .agent import coverage_loop_controller_agent
+from .agent import create_coverage_loop_controller_agent, __getattr__
 from .tools import should_continue_coverage_loop, exit_coverage_loop
 
 __all__ = [
     'coverage_loop_controller_agent',
+    'create_coverage_loop_controller_agent',
     'should_continue_coverage_loop',
     'exit_coverage_loop'
 ]
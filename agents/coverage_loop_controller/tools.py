@@ -3,13 +3,26 @@
 This module contains tools for controlling the coverage optimization loop in Stage 1.
 """
 
+import bisect
 import logging
-from typing import Dict, Any
+import statistics
+from types import MappingProxyType
+from typing import Dict, Any, List, Literal, MutableMapping, Optional
 from google.adk.tools import ToolContext
-from ..config import COVERAGE_MAX_ITERATIONS, COVERAGE_TARGET, MIN_COVERAGE_THRESHOLD
+from ..config import (
+    COVERAGE_MAX_ITERATIONS,
+    COVERAGE_TARGET,
+    MIN_COVERAGE_THRESHOLD,
+    COVERAGE_PLATEAU_WINDOW,
+    COVERAGE_PLATEAU_MIN_GAIN,
+    COVERAGE_PLATEAU_MAX_STDEV,
+)
 
 logger = logging.getLogger("two_stage_system")
 
+# Invocation that already sent the exit signal; temp: keys are not persisted
+_EXITED_STATE_KEY = 'temp:coverage_loop_exited'
+
 def exit_loop(tool_context: ToolContext):
     """
     Exits the coverage optimization loop. Call this tool when coverage target is achieved
@@ -17,13 +30,74 @@ def exit_loop(tool_context: ToolContext):
     """
     # Setting escalate to True signals to a LoopAgent that it should stop iterating.
     tool_context.actions.escalate = True
+    # A retried or repeated call in the same invocation only needs the escalation
+    if tool_context.state.get(_EXITED_STATE_KEY) == tool_context.invocation_id:
+        return "Loop already exited."
+    tool_context.state[_EXITED_STATE_KEY] = tool_context.invocation_id
     logger.info("Coverage loop exit signal sent - escalating to parent agent")
     return "Coverage optimization loop exit signal sent. Stage 1 complete, ready for Stage 2."
 
+def _as_float(value: Any) -> float:
+    """Coerce a coverage value given as a number or numeric string; anything else, including a bool, is 0.0."""
+    if isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip().rstrip('%'))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def _overall_coverage(coverage_validation: Dict[str, Any]) -> float:
+    """
+    Extract the overall coverage percentage from either validation format:
+    `coverage_summary.overall_coverage` from validate_scenario_coverage, or
+    `coverage_percentage` from calculate_coverage_metrics.
+    """
+    # Values may arrive as strings from serialized state, so compare them as floats;
+    # when both formats are present the higher reading wins
+    return max(
+        _as_float((coverage_validation.get("coverage_summary") or {}).get("overall_coverage")),
+        _as_float(coverage_validation.get("coverage_percentage"))
+    )
+
+
+# Readings kept in `coverage_history`: enough for the two windows _has_plateaued compares
+_COVERAGE_HISTORY_LIMIT = 2 * COVERAGE_PLATEAU_WINDOW
+
+
+def _has_plateaued(coverage_history: List[float]) -> bool:
+    """
+    Detect a coverage plateau over the last COVERAGE_PLATEAU_WINDOW iterations.
+
+    Coverage has plateaued when it gained less than COVERAGE_PLATEAU_MIN_GAIN
+    points across the window and varied by less than COVERAGE_PLATEAU_MAX_STDEV
+    within it. Once two full windows exist, the median must also have improved
+    by less than COVERAGE_PLATEAU_MIN_GAIN, so a single noisy reading can't end the loop.
+    """
+    window = COVERAGE_PLATEAU_WINDOW
+    if len(coverage_history) < window:
+        return False
+    recent = coverage_history[-window:]
+    if recent[-1] - recent[0] >= COVERAGE_PLATEAU_MIN_GAIN:
+        return False
+    if statistics.pstdev(recent) >= COVERAGE_PLATEAU_MAX_STDEV:
+        return False
+    if len(coverage_history) >= 2 * window:
+        previous = coverage_history[-2 * window:-window]
+        if statistics.median(recent) - statistics.median(previous) >= COVERAGE_PLATEAU_MIN_GAIN:
+            return False
+    return True
+
+
 def should_continue_coverage_loop(
     coverage_validation: Dict[str, Any],
     iteration_count: int,
-    max_iterations: int = COVERAGE_MAX_ITERATIONS
+    max_iterations: int = COVERAGE_MAX_ITERATIONS,
+    coverage_history: Optional[List[float]] = None
 ) -> Dict[str, Any]:
     """
     Determine if the coverage optimization loop should continue.
@@ -32,6 +106,7 @@ def should_continue_coverage_loop(
         coverage_validation: Results from coverage validation
         iteration_count: Current iteration number (0-based)
         max_iterations: Maximum allowed iterations
+        coverage_history: Overall coverage of each iteration so far, oldest first
         
     Returns:
         Dictionary with should_continue (bool) and reason (str)
@@ -52,28 +127,30 @@ def should_continue_coverage_loop(
             "deferred": True
         }
     
-    # Extract coverage metrics - handle both formats
-    # Format 1: From validate_scenario_coverage
-    coverage_summary = coverage_validation.get("coverage_summary", {})
-    overall_coverage_1 = coverage_summary.get("overall_coverage", 0)
-    
-    # Format 2: From calculate_coverage_metrics  
-    overall_coverage_2 = coverage_validation.get("coverage_percentage", 0)
-    
-    # Use whichever is available (prefer the more detailed one)
-    overall_coverage = max(overall_coverage_1, overall_coverage_2)
+    # Thresholds are read several times below
+    coverage_target = COVERAGE_TARGET
+    min_coverage_threshold = MIN_COVERAGE_THRESHOLD
+
+    # Extract coverage metrics - handle both formats:
+    # `coverage_summary.overall_coverage` from validate_scenario_coverage,
+    # `coverage_percentage` from calculate_coverage_metrics
+    overall_coverage = _overall_coverage(coverage_validation)
     meets_target = coverage_validation.get("meets_target", False)
     
-    # Additional check: if both coverage readings are 0 but we have coverage_summary structure,
-    # it might be a data format issue
-    if overall_coverage == 0 and coverage_summary and "overall_coverage" in coverage_summary:
-        logger.warning("Coverage data format issue detected - attempting alternative extraction")
-        # Try direct key access
-        overall_coverage = coverage_validation.get("coverage_summary", {}).get("overall_coverage", 0)
+    logger.debug(f"Current coverage: {overall_coverage}%, Target: {coverage_target}%")
     
-    logger.debug(f"Current coverage: {overall_coverage}%, Target: {COVERAGE_TARGET}%")
+    # Check if target coverage is achieved; no other condition matters then
+    if meets_target and overall_coverage >= coverage_target:
+        reason = f"Target coverage achieved: {overall_coverage}%"
+        logger.info(f"Stopping coverage loop: {reason}")
+        return {
+            "should_continue": False,
+            "reason": reason,
+            "final_coverage": overall_coverage,
+            "exit_type": "target_achieved"
+        }
     
-    # Check iteration limit first - prevent infinite loops
+    # Check iteration limit - prevent infinite loops
     if iteration_count >= max_iterations:
         reason = f"Maximum coverage iterations ({max_iterations}) reached"
         logger.info(f"Stopping coverage loop: {reason}")
@@ -84,38 +161,33 @@ def should_continue_coverage_loop(
             "exit_type": "max_iterations"
         }
     
-    # Check if target coverage is achieved
-    if meets_target and overall_coverage >= COVERAGE_TARGET:
-        reason = f"Target coverage achieved: {overall_coverage}%"
+    # Check if coverage is good enough to proceed (fallback condition)
+    if overall_coverage >= min_coverage_threshold and iteration_count >= 2:
+        reason = f"Acceptable coverage reached: {overall_coverage}% (≥{min_coverage_threshold}%) after {iteration_count} iterations"
         logger.info(f"Stopping coverage loop: {reason}")
         return {
             "should_continue": False,
             "reason": reason,
             "final_coverage": overall_coverage,
-            "exit_type": "target_achieved"
+            "exit_type": "acceptable_threshold"
         }
     
-    # Check if coverage is good enough to proceed (fallback condition)
-    if overall_coverage >= MIN_COVERAGE_THRESHOLD and iteration_count >= 2:
-        reason = f"Acceptable coverage reached: {overall_coverage}% (≥{MIN_COVERAGE_THRESHOLD}%) after {iteration_count} iterations"
+    # Check for no improvement (stagnation detection)
+    if coverage_history and _has_plateaued(coverage_history):
+        reason = f"Coverage plateaued at {overall_coverage}% over the last {COVERAGE_PLATEAU_WINDOW} iterations"
         logger.info(f"Stopping coverage loop: {reason}")
         return {
             "should_continue": False,
             "reason": reason,
             "final_coverage": overall_coverage,
-            "exit_type": "acceptable_threshold"
+            "exit_type": "plateau"
         }
     
-    # Check for no improvement (stagnation detection)
-    if iteration_count > 0:
-        # This would require tracking previous coverage, for now assume improvement is possible
-        pass
-    
     # Continue if coverage is insufficient and iterations remain
     remaining_iterations = max_iterations - iteration_count
-    gap = COVERAGE_TARGET - overall_coverage
+    gap = coverage_target - overall_coverage
     
-    reason = f"Coverage insufficient: {overall_coverage}% (target: {COVERAGE_TARGET}%). Gap: {gap:.1f}%. {remaining_iterations} iterations remaining."
+    reason = f"Coverage insufficient: {overall_coverage}% (target: {coverage_target}%). Gap: {gap:.1f}%. {remaining_iterations} iterations remaining."
     
     logger.info(f"Continuing coverage loop: {reason}")
     return {
@@ -127,6 +199,54 @@ def should_continue_coverage_loop(
     }
 
 
+def decide_coverage_loop(state: MutableMapping[str, Any]) -> Literal['continue', 'exit']:
+    """
+    Decide whether the coverage optimization loop continues, without a model turn.
+
+    Evaluates `should_continue_coverage_loop` on the validation result and iteration
+    count held in state, records the decision in `coverage_loop_decision`, and marks
+    Stage 1 complete when the loop should exit.
+
+    Args:
+        state: The session state (e.g. `tool_context.state`, or a ChainMap over a pending state delta)
+
+    Returns:
+        'continue' to run another iteration, 'exit' to leave the loop
+    """
+    coverage_validation = state.get('coverage_validation_result') or {}
+    # Reassigned rather than appended in place so the change is recorded in the state delta.
+    # Plateau detection compares at most two windows, so older readings are dropped;
+    # a plain list (not a deque) keeps the state serializable.
+    coverage_history = list(state.get('coverage_history') or [])
+    if isinstance(coverage_validation, dict) and coverage_validation:
+        coverage_history.append(_overall_coverage(coverage_validation))
+        del coverage_history[:-_COVERAGE_HISTORY_LIMIT]
+        state['coverage_history'] = coverage_history
+    decision = should_continue_coverage_loop(
+        coverage_validation,
+        state.get('coverage_iteration', 0),
+        coverage_history=coverage_history
+    )
+    state['coverage_loop_decision'] = decision
+    if decision['should_continue']:
+        return 'continue'
+    state['stage1_complete'] = True
+    return 'exit'
+
+
+# Fields of the exit_coverage_loop result that do not depend on its arguments
+_EXIT_RESULT_BASE = MappingProxyType({
+    "should_continue": False,  # Critical: Signal to exit the loop
+    "stage1_complete": True,
+    "timestamp": "coverage_loop_exit"
+})
+# Stage 2 readiness and completion message, indexed by whether the threshold was met
+_STAGE2_READINESS = (
+    ("LIMITED", "Stage 1 completed with {}% coverage (below optimal threshold). Proceeding to Stage 2 with current scenarios."),
+    ("READY", "Stage 1 completed successfully with {}% coverage. Ready to proceed to Stage 2."),
+)
+
+
 def exit_coverage_loop(
     final_coverage: float,
     exit_reason: str
@@ -146,29 +266,42 @@ def exit_coverage_loop(
     
     # Determine readiness for Stage 2
     ready_for_stage2 = final_coverage >= MIN_COVERAGE_THRESHOLD
-    
-    if ready_for_stage2:
-        stage2_readiness = "READY"
-        message = f"Stage 1 completed successfully with {final_coverage}% coverage. Ready to proceed to Stage 2."
-    else:
-        stage2_readiness = "LIMITED"
-        message = f"Stage 1 completed with {final_coverage}% coverage (below optimal threshold). Proceeding to Stage 2 with current scenarios."
+    stage2_readiness, message_template = _STAGE2_READINESS[ready_for_stage2]
     
     result = {
-        "should_continue": False,  # Critical: Signal to exit the loop
-        "stage1_complete": True,
+        **_EXIT_RESULT_BASE,
         "final_coverage_percentage": final_coverage,
         "exit_reason": exit_reason,
         "stage2_readiness": stage2_readiness,
         "ready_for_stage2": ready_for_stage2,
-        "completion_message": message,
-        "timestamp": "coverage_loop_exit"
+        "completion_message": message_template.format(final_coverage),
     }
     
     logger.info(f"Coverage loop exit complete: {stage2_readiness} for Stage 2")
     return result
 
 
+# Improvement bands: an improvement above _IMPROVEMENT_THRESHOLDS[i - 1] and at most
+# _IMPROVEMENT_THRESHOLDS[i] maps to _IMPROVEMENT_STATUSES[i]. Changes within the
+# tolerance around zero are rounding noise from the percentage math.
+_IMPROVEMENT_TOLERANCE = 1e-9
+_IMPROVEMENT_THRESHOLDS = (-_IMPROVEMENT_TOLERANCE, _IMPROVEMENT_TOLERANCE, 1.0, 5.0)
+_IMPROVEMENT_STATUSES = (
+    "regression",
+    "no_improvement",
+    "minor_improvement",
+    "moderate_improvement",
+    "significant_improvement",
+)
+_IMPROVEMENT_RECOMMENDATIONS = (
+    "Investigation needed - coverage decreased",
+    "Consider stopping - no progress detected",
+    "Consider continuing - slow progress",
+    "Continue optimization - steady progress",
+    "Continue optimization - good progress",
+)
+
+
 def analyze_coverage_improvement(
     previous_coverage: float,
     current_coverage: float,
@@ -190,21 +323,10 @@ def analyze_coverage_improvement(
     improvement = current_coverage - previous_coverage
     improvement_rate = (improvement / previous_coverage * 100) if previous_coverage > 0 else 0
     
-    if improvement > 5.0:
-        status = "significant_improvement"
-        recommendation = "Continue optimization - good progress"
-    elif improvement > 1.0:
-        status = "moderate_improvement"
-        recommendation = "Continue optimization - steady progress"
-    elif improvement > 0:
-        status = "minor_improvement"
-        recommendation = "Consider continuing - slow progress"
-    elif improvement == 0:
-        status = "no_improvement"
-        recommendation = "Consider stopping - no progress detected"
-    else:
-        status = "regression"
-        recommendation = "Investigation needed - coverage decreased"
+    # bisect_left keeps the bands right-closed, e.g. exactly 5.0 is a moderate improvement
+    band = bisect.bisect_left(_IMPROVEMENT_THRESHOLDS, improvement)
+    status = _IMPROVEMENT_STATUSES[band]
+    recommendation = _IMPROVEMENT_RECOMMENDATIONS[band]
     
     result = {
         "improvement_absolute": improvement,
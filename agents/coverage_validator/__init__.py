@@ -4,11 +4,12 @@ This module contains the agent responsible for validating test scenario coverage
 in Stage 1 of the two-stage architecture.
 """
 
-from .agent import coverage_validator_agent
+from .agent import create_coverage_validator_agent, __getattr__
 from .tools import validate_scenario_coverage, calculate_coverage_metrics
 
 __all__ = [
     'coverage_validator_agent',
+    'create_coverage_validator_agent',
     'validate_scenario_coverage',
     'calculate_coverage_metrics'
 ]
@@ -3,69 +3,71 @@
 This agent validates test scenario coverage against code structure in Stage 1.
 """
 
-from google.adk.agents import LlmAgent
+from collections import ChainMap
+from typing import AsyncGenerator
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import validate_scenario_coverage
-from ..coverage_loop_controller.tools import should_continue_coverage_loop, exit_coverage_loop, exit_loop
+from ..coverage_loop_controller.tools import decide_coverage_loop
 
-# Create the coverage validator agent
-coverage_validator_agent = LlmAgent(
-    name="CoverageValidator",
-    description="Validates test scenario coverage against code structure",
-    model="gemini-2.5-flash",
-    instruction="""
-    You are a specialized coverage validation expert for Stage 1 of the two-stage architecture.
-    
-    Your SOLE responsibility is to validate whether test scenarios provide adequate coverage
-    of the code structure WITHOUT executing any tests.
-    
-    **Your Process:**
-    1. You will receive test scenarios from state: {coverage_focused_scenarios}
-    2. You will receive static analysis from state: {static_analysis_report}
-    3. You will receive current iteration count from state: {coverage_iteration}
-    4. Call `validate_scenario_coverage` to perform static coverage analysis
-    5. Call `should_continue_coverage_loop` with the validation results to make loop decision
-    6. If loop should exit, call `exit_coverage_loop` and then `exit_loop()`
-    7. Provide a clear assessment including the loop decision
-    
-    **Key Validation Criteria:**
-    - All functions are covered by at least one scenario
-    - All class methods are covered by at least one scenario  
-    - All classes have instantiation scenarios
-    - Overall coverage percentage calculation
-    
-    **You do NOT validate:**
-    - Test execution success or failure
-    - Test code quality or syntax
-    - Performance or runtime metrics
-    
-    **Output Format:**
-    Provide a clear, structured report including:
-    - Overall coverage percentage
-    - Coverage status (complete/excellent/good/moderate/insufficient)
-    - Specific gaps if any (uncovered functions, methods, classes)
-    - Recommendation for next steps
-    - Whether coverage target is met for Stage 1 completion
-    
-    **Example Output:**
-    "Coverage Validation Results:
-    
-    Overall Coverage: 95.2%
-    Status: Excellent
-    
-    Coverage Breakdown:
-    - Functions: 100% (5/5 covered)
-    - Methods: 87.5% (7/8 covered) 
-    - Classes: 100% (2/2 covered)
-    
-    Remaining Gaps:
-    - Method 'Calculator.divide' not covered by any scenario
-    
-    Recommendation: Near-complete coverage achieved. Consider adding one scenario for the uncovered divide method to reach 100% coverage, or proceed to Stage 2 with current excellent coverage."
-    
-    **Success Criteria for Stage 1:**
-    - Target: 100% coverage (ideal)
-    - Minimum: 80% coverage (acceptable to proceed)
-    """,
-    tools=[validate_scenario_coverage, should_continue_coverage_loop, exit_coverage_loop, exit_loop],
-    output_key="coverage_validation_result"
-)
+
+class CoverageValidatorAgent(BaseAgent):
+    """
+    Validates the current scenarios and decides the coverage loop without a model call.
+
+    Both steps are deterministic: the scenarios and static analysis are already in
+    state, and the loop decision is arithmetic on the validation result. The agent
+    records `coverage_validation_result`, `coverage_iteration` and the loop decision
+    in one state delta, and escalates out of the LoopAgent when Stage 1 is done.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        scenarios = state.get('coverage_focused_scenarios') or []
+        if isinstance(scenarios, dict):
+            scenarios = scenarios.get('scenarios', [])
+        validation = validate_scenario_coverage(scenarios, state.get('static_analysis_report') or {})
+
+        # Writes go to the delta while reads fall through to the session state
+        state_delta = {
+            'coverage_validation_result': validation,
+            'coverage_iteration': state.get('coverage_iteration', 0) + 1,
+        }
+        loop_decision = decide_coverage_loop(ChainMap(state_delta, state))
+        decision = state_delta['coverage_loop_decision']
+
+        summary = validation['coverage_summary']
+        uncovered = validation['uncovered_counts']
+        report = (
+            "Coverage Validation Results:\n\n"
+            f"Overall Coverage: {summary['overall_coverage']}%\n"
+            f"- Functions: {summary['function_coverage']}%\n"
+            f"- Methods: {summary['method_coverage']}%\n"
+            f"- Classes: {summary['class_coverage']}%\n\n"
+            f"Uncovered: {uncovered['functions']} functions, "
+            f"{uncovered['methods']} methods, {uncovered['classes']} classes\n"
+            f"Loop decision: {loop_decision} ({decision['reason']})"
+        )
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=report)]),
+            actions=EventActions(state_delta=state_delta, escalate=loop_decision == 'exit'),
+        )
+
+
+def create_coverage_validator_agent() -> BaseAgent:
+    """Creates and returns a configured Coverage Validator agent."""
+    return CoverageValidatorAgent(
+        name="CoverageValidator",
+        description="Validates test scenario coverage against code structure",
+    )
+
+
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, coverage_validator_agent=create_coverage_validator_agent)
@@ -3,30 +3,48 @@
 This module contains tools for validating test scenario coverage against code structure.
 """
 
+import bisect
+import hashlib
 import logging
-from typing import Dict, List, Any, Set
+import orjson
+from typing import Dict, FrozenSet, List, Any, Set, Tuple
 
 logger = logging.getLogger("two_stage_system")
 
-def validate_scenario_coverage(
-    test_scenarios: List[Dict[str, Any]],
-    static_analysis: Dict[str, Any]
-) -> Dict[str, Any]:
-    """
-    Validate that test scenarios provide adequate coverage of the code structure.
-    
-    This is a static analysis that maps scenarios to code units without execution.
-    
-    Args:
-        test_scenarios: List of test scenarios to validate
-        static_analysis: Static code analysis results
-        
-    Returns:
-        Dictionary with coverage validation results
-    """
-    logger.info(f"Validating coverage for {len(test_scenarios)} scenarios")
-    
-    # Extract all testable units from static analysis
+# Testable units derived from a static analysis report, keyed by a digest of the
+# serialized report. The report is the same on every coverage loop iteration.
+_STATIC_UNITS_CACHE: Dict[bytes, Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]] = {}
+_STATIC_UNITS_CACHE_SIZE = 32
+
+# Maximum number of uncovered unit names listed per unit type; the full counts
+# are reported separately in "uncovered_counts"
+MAX_REPORTED_UNITS = 50
+
+# Coverage status bands: a coverage of at least _COVERAGE_STATUS_THRESHOLDS[i - 1]
+# and below _COVERAGE_STATUS_THRESHOLDS[i] maps to _COVERAGE_STATUSES[i]
+_COVERAGE_STATUS_THRESHOLDS = (60.0, 80.0, 90.0, 100.0)
+_COVERAGE_STATUSES = ("insufficient", "moderate", "good", "excellent", "complete")
+_COVERAGE_RECOMMENDATIONS = (
+    "Insufficient coverage. Major improvements needed.",
+    "Moderate coverage. Significant gaps need attention.",
+    "Good coverage achieved. Minor gaps remain.",
+    "Near-complete coverage. Consider proceeding to Stage 2.",
+    "Coverage target achieved. Ready for Stage 2.",
+)
+
+
+def invalidate_static_cache() -> None:
+    """Drop all cached static-analysis unit sets, e.g. after the source is re-analyzed."""
+    _STATIC_UNITS_CACHE.clear()
+
+
+def _static_units(static_analysis: Dict[str, Any]) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    """Return the functions, classes and `Class.method` names in a static analysis report."""
+    key = hashlib.blake2b(orjson.dumps(static_analysis), digest_size=16).digest()
+    cached = _STATIC_UNITS_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     all_functions = set()
     all_classes = set()
     all_methods = set()
@@ -66,39 +84,86 @@ def validate_scenario_coverage(
                 method_name = method.get('name')
                 if method_name:
                     all_methods.add(f"{class_name}.{method_name}")
+
+    units = (frozenset(all_functions), frozenset(all_classes), frozenset(all_methods))
+    if len(_STATIC_UNITS_CACHE) >= _STATIC_UNITS_CACHE_SIZE:
+        # Evict the oldest entry
+        del _STATIC_UNITS_CACHE[next(iter(_STATIC_UNITS_CACHE))]
+    _STATIC_UNITS_CACHE[key] = units
+    return units
+
+
+def validate_scenario_coverage(
+    test_scenarios: List[Dict[str, Any]],
+    static_analysis: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Validate that test scenarios provide adequate coverage of the code structure.
     
-    # Track covered units by analyzing scenario targets
-    covered_functions = set()
-    covered_classes = set()
-    covered_methods = set()
+    This is a static analysis that maps scenarios to code units without execution.
     
+    Args:
+        test_scenarios: List of test scenarios to validate
+        static_analysis: Static code analysis results
+        
+    Returns:
+        Dictionary with coverage validation results
+    """
+    logger.info("Validating coverage for %d scenarios", len(test_scenarios))
+    
+    # Extract all testable units from static analysis
+    all_functions, all_classes, all_methods = _static_units(static_analysis)
+
+    # Track covered units by analyzing scenario targets
+    # Partition target names by unit type in one pass, then build each set at once
+    targets_by_type = {'function': [], 'class': [], 'method': []}
     for scenario in test_scenarios:
         target_type = scenario.get('target_type', '')
-        target_name = scenario.get('target_name', '')
-        coverage_target = scenario.get('coverage_target', '')
-        
-        # Parse coverage target to determine what's covered
-        if target_type == 'function' or coverage_target.startswith('function:'):
-            covered_functions.add(target_name)
-        elif target_type == 'class' or coverage_target.startswith('class:'):
-            covered_classes.add(target_name)
-        elif target_type == 'method' or coverage_target.startswith('method:'):
-            covered_methods.add(target_name)
+        if target_type not in targets_by_type:
+            # Fall back to the prefix of the coverage target, e.g. "method:Calculator.add"
+            target_type, has_prefix, _ = scenario.get('coverage_target', '').partition(':')
+            if not has_prefix or target_type not in targets_by_type:
+                continue
+        targets_by_type[target_type].append(scenario.get('target_name', ''))
+
+    covered_functions = set(targets_by_type['function'])
+    covered_classes = set(targets_by_type['class'])
+    covered_methods = set(targets_by_type['method'])
     
     # Calculate coverage metrics
-    total_units = len(all_functions) + len(all_classes) + len(all_methods)
-    covered_units = len(covered_functions) + len(covered_classes) + len(covered_methods)
+    nf, nc, nm = len(all_functions), len(all_classes), len(all_methods)
+    total_units = nf + nc + nm
     
-    overall_coverage = (covered_units / total_units * 100) if total_units > 0 else 0
-    
-    function_coverage = (len(covered_functions) / len(all_functions) * 100) if all_functions else 100
-    class_coverage = (len(covered_classes) / len(all_classes) * 100) if all_classes else 100
-    method_coverage = (len(covered_methods) / len(all_methods) * 100) if all_methods else 100
-    
-    # Identify uncovered units
-    uncovered_functions = all_functions - covered_functions
-    uncovered_classes = all_classes - covered_classes
-    uncovered_methods = all_methods - covered_methods
+    # Full coverage is a set question, so answer it before any percentage math
+    meets_target = (
+        total_units > 0
+        and covered_functions >= all_functions
+        and covered_classes >= all_classes
+        and covered_methods >= all_methods
+    )
+    if meets_target:
+        ncf, ncc, ncm = nf, nc, nm
+        covered_units = total_units
+        overall_coverage = function_coverage = class_coverage = method_coverage = 100.0
+        uncovered_functions, uncovered_classes, uncovered_methods = [], [], []
+    else:
+        ncf, ncc, ncm = len(covered_functions), len(covered_classes), len(covered_methods)
+        covered_units = ncf + ncc + ncm
+        
+        overall_coverage = (covered_units / total_units * 100) if total_units > 0 else 0
+        function_coverage = (ncf / nf * 100) if nf else 100
+        class_coverage = (ncc / nc * 100) if nc else 100
+        method_coverage = (ncm / nm * 100) if nm else 100
+        
+        # Identify uncovered units, sorted and capped at MAX_REPORTED_UNITS per type
+        uncovered_functions = sorted(name for name in all_functions if name not in covered_functions)
+        uncovered_classes = sorted(name for name in all_classes if name not in covered_classes)
+        uncovered_methods = sorted(name for name in all_methods if name not in covered_methods)
+    uncovered_counts = {
+        "functions": len(uncovered_functions),
+        "classes": len(uncovered_classes),
+        "methods": len(uncovered_methods)
+    }
     
     result = {
         "coverage_summary": {
@@ -118,11 +183,12 @@ def validate_scenario_coverage(
             "methods": list(covered_methods)
         },
         "uncovered_units": {
-            "functions": list(uncovered_functions),
-            "classes": list(uncovered_classes),
-            "methods": list(uncovered_methods)
+            "functions": uncovered_functions[:MAX_REPORTED_UNITS],
+            "classes": uncovered_classes[:MAX_REPORTED_UNITS],
+            "methods": uncovered_methods[:MAX_REPORTED_UNITS]
         },
-        "meets_target": overall_coverage >= 100.0,
+        "uncovered_counts": uncovered_counts,
+        "meets_target": meets_target,
         "validation_metadata": {
             "total_scenarios": len(test_scenarios),
             "scenarios_analyzed": len(test_scenarios),
@@ -130,24 +196,26 @@ def validate_scenario_coverage(
         }
     }
     
-    logger.info(f"Coverage validation complete: {overall_coverage:.2f}% overall coverage")
-    logger.info(f"📊 Coverage Breakdown:")
-    logger.info(f"   Functions: {function_coverage:.1f}% ({len(covered_functions)}/{len(all_functions)} covered)")
-    logger.info(f"   Classes: {class_coverage:.1f}% ({len(covered_classes)}/{len(all_classes)} covered)")
-    logger.info(f"   Methods: {method_coverage:.1f}% ({len(covered_methods)}/{len(all_methods)} covered)")
-    
-    if uncovered_functions or uncovered_classes or uncovered_methods:
-        logger.info("⚠️  Uncovered Units:")
-        if uncovered_functions:
-            logger.info(f"   Functions: {', '.join(uncovered_functions)}")
-        if uncovered_classes:
-            logger.info(f"   Classes: {', '.join(uncovered_classes)}")
-        if uncovered_methods:
-            logger.info(f"   Methods: {', '.join(uncovered_methods)}")
-    else:
-        logger.info("✅ All units covered!")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Coverage validation complete: %.2f%% overall coverage", overall_coverage)
+        logger.info("📊 Coverage Breakdown:")
+        logger.info("   Functions: %.1f%% (%d/%d covered)", function_coverage, ncf, nf)
+        logger.info("   Classes: %.1f%% (%d/%d covered)", class_coverage, ncc, nc)
+        logger.info("   Methods: %.1f%% (%d/%d covered)", method_coverage, ncm, nm)
+        
+        if uncovered_functions or uncovered_classes or uncovered_methods:
+            logger.info("⚠️  Uncovered Units:")
+            if uncovered_functions:
+                logger.info("   Functions: %s", ', '.join(uncovered_functions))
+            if uncovered_classes:
+                logger.info("   Classes: %s", ', '.join(uncovered_classes))
+            if uncovered_methods:
+                logger.info("   Methods: %s", ', '.join(uncovered_methods))
+        else:
+            logger.info("✅ All units covered!")
     
-    logger.debug(f"Function coverage: {function_coverage:.2f}%, Class coverage: {class_coverage:.2f}%, Method coverage: {method_coverage:.2f}%")
+    logger.debug("Function coverage: %.2f%%, Class coverage: %.2f%%, Method coverage: %.2f%%",
+                 function_coverage, class_coverage, method_coverage)
     
     return result
 
@@ -169,52 +237,46 @@ def calculate_coverage_metrics(
     coverage_summary = coverage_validation.get("coverage_summary", {})
     coverage_details = coverage_validation.get("coverage_details", {})
     uncovered_units = coverage_validation.get("uncovered_units", {})
+    # Uncovered lists are already capped upstream, so take the counts from the
+    # full tallies when present
+    uncovered_counts = coverage_validation.get("uncovered_counts", {})
     
     overall_coverage = coverage_summary.get("overall_coverage", 0)
     
     # Determine coverage status
-    if overall_coverage >= 100.0:
-        status = "complete"
-        recommendation = "Coverage target achieved. Ready for Stage 2."
-    elif overall_coverage >= 90.0:
-        status = "excellent" 
-        recommendation = "Near-complete coverage. Consider proceeding to Stage 2."
-    elif overall_coverage >= 80.0:
-        status = "good"
-        recommendation = "Good coverage achieved. Minor gaps remain."
-    elif overall_coverage >= 60.0:
-        status = "moderate"
-        recommendation = "Moderate coverage. Significant gaps need attention."
-    else:
-        status = "insufficient"
-        recommendation = "Insufficient coverage. Major improvements needed."
+    status_index = bisect.bisect_right(_COVERAGE_STATUS_THRESHOLDS, overall_coverage)
+    status = _COVERAGE_STATUSES[status_index]
+    recommendation = _COVERAGE_RECOMMENDATIONS[status_index]
     
     # Identify priority improvement areas
     improvement_areas = []
     
     uncovered_functions = uncovered_units.get("functions", [])
+    function_gaps = uncovered_counts.get("functions", len(uncovered_functions))
     if uncovered_functions:
         improvement_areas.append({
             "type": "functions",
-            "count": len(uncovered_functions),
+            "count": function_gaps,
             "items": uncovered_functions[:5],  # Show first 5
             "priority": "high"
         })
     
     uncovered_methods = uncovered_units.get("methods", [])
+    method_gaps = uncovered_counts.get("methods", len(uncovered_methods))
     if uncovered_methods:
         improvement_areas.append({
             "type": "methods",
-            "count": len(uncovered_methods),
+            "count": method_gaps,
             "items": uncovered_methods[:5],  # Show first 5
             "priority": "high"
         })
     
     uncovered_classes = uncovered_units.get("classes", [])
+    class_gaps = uncovered_counts.get("classes", len(uncovered_classes))
     if uncovered_classes:
         improvement_areas.append({
             "type": "classes",
-            "count": len(uncovered_classes),
+            "count": class_gaps,
             "items": uncovered_classes[:5],  # Show first 5
             "priority": "medium"
         })
@@ -228,8 +290,8 @@ def calculate_coverage_metrics(
         "metrics_breakdown": coverage_summary,
         "gap_analysis": {
             "total_gaps": coverage_details.get("uncovered_units", 0),
-            "critical_gaps": len(uncovered_functions) + len(uncovered_methods),
-            "minor_gaps": len(uncovered_classes)
+            "critical_gaps": function_gaps + method_gaps,
+            "minor_gaps": class_gaps
         }
     }
     
@@ -3,7 +3,7 @@
 This package contains the debugger and refiner agent and its associated tools.
 """
 
-from .agent import debugger_and_refiner_agent, create_debugger_and_refiner_agent
+from .agent import create_debugger_and_refiner_agent, __getattr__
 
 __all__ = ['debugger_and_refiner_agent', 'create_debugger_and_refiner_agent']
 
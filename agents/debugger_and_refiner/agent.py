@@ -4,7 +4,9 @@ This agent analyzes test failures and autonomously attempts to correct
 the generated test code.
 """
 
+import inspect
 from google.adk.agents import LlmAgent
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import exit_loop
 
 
@@ -14,7 +16,7 @@ def create_debugger_and_refiner_agent() -> LlmAgent:
         name="DebuggerAndRefiner",
         description="Analyzes test failures and autonomously attempts to correct the generated test code.",
         model="gemini-2.5-pro",  # This task requires strong reasoning and code generation
-        instruction="""
+        instruction=inspect.cleandoc("""
         You are an expert Senior Software Debugging Engineer. Your sole purpose is to analyze a failed test run and fix the generated test code.
 
         You will be provided with a JSON object containing three key pieces of information:
@@ -38,11 +40,10 @@ def create_debugger_and_refiner_agent() -> LlmAgent:
         -   Your response should start directly with Python code (import statements).
         -   Ensure the corrected code is a single, complete, and syntactically valid Python script.
         -   Preserve the parts of the test file that were correct and only modify what is necessary to fix the failures.
-        """,
+        """),
         tools=[exit_loop]
     )
 
 
-# Create the agent instance for backward compatibility
-debugger_and_refiner_agent = create_debugger_and_refiner_agent()
-
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, debugger_and_refiner_agent=create_debugger_and_refiner_agent)
@@ -4,11 +4,12 @@ This module contains the agent responsible for controlling the execution quality
 in Stage 2 of the two-stage architecture.
 """
 
-from .agent import execution_loop_controller_agent
+from .agent import create_execution_loop_controller_agent, __getattr__
 from .tools import should_continue_execution_loop, exit_execution_loop
 
 __all__ = [
     'execution_loop_controller_agent',
+    'create_execution_loop_controller_agent',
     'should_continue_execution_loop',
     'exit_execution_loop'
 ]
@@ -3,13 +3,26 @@
 This module contains tools for controlling the execution quality loop in Stage 2.
 """
 
+import bisect
 import logging
-from typing import Dict, Any
+import statistics
+from types import MappingProxyType
+from typing import Dict, Any, List, NamedTuple, Optional
 from google.adk.tools import ToolContext
-from ..config import EXECUTION_MAX_ITERATIONS, EXECUTION_SUCCESS_THRESHOLD
+from ..config import (
+    EXECUTION_MAX_ITERATIONS,
+    EXECUTION_SUCCESS_THRESHOLD,
+    EXECUTION_STAGNATION_WINDOW,
+    EXECUTION_STAGNATION_TOL,
+    EXECUTION_STAGNATION_MIN_GAIN,
+    EXECUTION_STAGNATION_MAX_CV,
+)
 
 logger = logging.getLogger(__name__)
 
+# Invocation that already sent the exit signal; temp: keys are not persisted
+_EXITED_STATE_KEY = 'temp:execution_loop_exited'
+
 def exit_loop(tool_context: ToolContext):
     """
     Exits the execution quality loop. Call this tool when all tests are passing
@@ -17,26 +30,63 @@ def exit_loop(tool_context: ToolContext):
     """
     # Setting escalate to True signals to a LoopAgent that it should stop iterating.
     tool_context.actions.escalate = True
+    # A retried or repeated call in the same invocation only needs the escalation
+    if tool_context.state.get(_EXITED_STATE_KEY) == tool_context.invocation_id:
+        return "Loop already exited."
+    tool_context.state[_EXITED_STATE_KEY] = tool_context.invocation_id
     logger.info("Execution loop exit signal sent - escalating to parent agent")
     return "Execution quality loop exit signal sent. Stage 2 complete, ready for final reporting."
 
+def _stagnation_type(success_history: List[float]) -> Optional[str]:
+    """
+    Detect a stagnant success rate from the recent execution loop history.
+
+    With two full windows of EXECUTION_STAGNATION_WINDOW iterations, the loop has
+    stagnated when the median of the latest window improved by less than
+    EXECUTION_STAGNATION_MIN_GAIN (relative) over the window before it AND the
+    latest window is steady (stdev below EXECUTION_STAGNATION_MAX_CV of its median).
+    Requiring both keeps oscillating retries from ending the loop. With only one
+    window, the success rates must stay within EXECUTION_STAGNATION_TOL points.
+
+    Returns:
+        'stagnation_combined' or 'stagnation' when the loop has stagnated, else None
+    """
+    window = EXECUTION_STAGNATION_WINDOW
+    if len(success_history) < window:
+        return None
+    recent = success_history[-window:]
+    if len(success_history) < 2 * window:
+        return 'stagnation' if max(recent) - min(recent) < EXECUTION_STAGNATION_TOL else None
+
+    med_recent = statistics.median(recent)
+    med_prior = statistics.median(success_history[-2 * window:-window])
+    stalled = (med_recent - med_prior) / max(med_prior, 1e-6) < EXECUTION_STAGNATION_MIN_GAIN
+    steady = statistics.stdev(recent) / max(med_recent, 1e-6) < EXECUTION_STAGNATION_MAX_CV
+    return 'stagnation_combined' if stalled and steady else None
+
+
 def should_continue_execution_loop(
     test_status_summary: Dict[str, Any],
     iteration_count: int,
-    max_iterations: int = EXECUTION_MAX_ITERATIONS
+    max_iterations: int = EXECUTION_MAX_ITERATIONS,
+    tool_context: Optional[ToolContext] = None
 ) -> Dict[str, Any]:
     """
     Determine if the execution quality loop should continue.
     
+    Each call records the success rate for `iteration_count` in `exec_success_history`
+    so that a stagnant loop can stop before running out of iterations.
+    
     Args:
         test_status_summary: Summary from test case status tracker
         iteration_count: Current iteration number (0-based)
         max_iterations: Maximum allowed iterations
+        tool_context: Tool context providing the session state (injected by ADK)
         
     Returns:
         Dictionary with should_continue (bool) and reason (str)
     """
-    logger.info(f"Evaluating execution loop continuation (iteration {iteration_count}/{max_iterations})")
+    logger.info("Evaluating execution loop continuation (iteration %s/%s)", iteration_count, max_iterations)
     
     # Extract key metrics
     all_tests_passing = test_status_summary.get("all_tests_passing", False)
@@ -44,24 +94,29 @@ def should_continue_execution_loop(
     tests_needing_attention = test_status_summary.get("tests_needing_attention", 0)
     total_tests = test_status_summary.get("total_tests", 0)
     
-    logger.debug(f"Current metrics: {success_rate:.1f}% success rate, {tests_needing_attention} tests need attention")
+    logger.debug("Current metrics: %.1f%% success rate, %s tests need attention", success_rate, tests_needing_attention)
     
-    # Check iteration limit first - prevent infinite loops
-    if iteration_count >= max_iterations:
-        reason = f"Maximum execution iterations ({max_iterations}) reached"
-        logger.info(f"Stopping execution loop: {reason}")
-        return {
-            "should_continue": False,
-            "reason": reason,
-            "final_success_rate": success_rate,
-            "exit_type": "max_iterations",
-            "tests_still_failing": tests_needing_attention
-        }
+    # Threshold is read several times below
+    success_threshold = EXECUTION_SUCCESS_THRESHOLD
+    
+    success_history = []
+    if tool_context is not None:
+        # Entries are [iteration, success_rate] pairs, so a repeated call within one
+        # iteration replaces that iteration's reading instead of adding another.
+        # Reassigned rather than edited in place so the change is recorded in the state delta
+        history = [
+            entry for entry in tool_context.state.get('exec_success_history') or []
+            if entry[0] != iteration_count
+        ]
+        history.append([iteration_count, float(success_rate)])
+        del history[:-2 * EXECUTION_STAGNATION_WINDOW]
+        tool_context.state['exec_success_history'] = history
+        success_history = [rate for _, rate in history]
     
     # Check if all tests are passing (ideal success)
     if all_tests_passing:
         reason = f"All {total_tests} tests are now passing"
-        logger.info(f"Stopping execution loop: {reason}")
+        logger.info("Stopping execution loop: %s", reason)
         return {
             "should_continue": False,
             "reason": reason,
@@ -71,9 +126,9 @@ def should_continue_execution_loop(
         }
     
     # Check if success rate meets threshold (acceptable success)
-    if success_rate >= EXECUTION_SUCCESS_THRESHOLD and iteration_count >= 2:
-        reason = f"Success rate threshold met: {success_rate:.1f}% (≥{EXECUTION_SUCCESS_THRESHOLD}%) after {iteration_count} iterations"
-        logger.info(f"Stopping execution loop: {reason}")
+    if success_rate >= success_threshold and iteration_count >= 2:
+        reason = f"Success rate threshold met: {success_rate:.1f}% (≥{success_threshold}%) after {iteration_count} iterations"
+        logger.info("Stopping execution loop: %s", reason)
         return {
             "should_continue": False,
             "reason": reason,
@@ -83,17 +138,36 @@ def should_continue_execution_loop(
         }
     
     # Check for no improvement (stagnation detection)
-    if iteration_count > 0 and tests_needing_attention > 0:
-        # This would require tracking previous iteration results
-        # For now, assume improvement is possible if iterations remain
-        pass
+    stagnation = _stagnation_type(success_history)
+    if stagnation:
+        reason = f"Success rate stagnated at {success_rate:.1f}% over the last {len(success_history)} iterations"
+        logger.info("Stopping execution loop: %s", reason)
+        return {
+            "should_continue": False,
+            "reason": reason,
+            "final_success_rate": success_rate,
+            "exit_type": stagnation,
+            "tests_still_failing": tests_needing_attention
+        }
+    
+    # Iteration limit is the last resort - prevent infinite loops
+    if iteration_count >= max_iterations:
+        reason = f"Maximum execution iterations ({max_iterations}) reached"
+        logger.info("Stopping execution loop: %s", reason)
+        return {
+            "should_continue": False,
+            "reason": reason,
+            "final_success_rate": success_rate,
+            "exit_type": "max_iterations",
+            "tests_still_failing": tests_needing_attention
+        }
     
     # Continue if there are failing tests and iterations remain
     remaining_iterations = max_iterations - iteration_count
     
     reason = f"Tests still failing: {tests_needing_attention}/{total_tests} ({success_rate:.1f}% success rate). {remaining_iterations} iterations remaining."
     
-    logger.info(f"Continuing execution loop: {reason}")
+    logger.info("Continuing execution loop: %s", reason)
     return {
         "should_continue": True,
         "reason": reason,
@@ -103,6 +177,36 @@ def should_continue_execution_loop(
     }
 
 
+# Fields of the exit_execution_loop result that do not depend on its arguments
+_EXECUTION_EXIT_RESULT_BASE = MappingProxyType({
+    "stage2_complete": True,
+    "system_complete": True,
+    "ready_for_reporting": True,
+    "timestamp": "execution_loop_exit"
+})
+# System status, completion message, return strategy and return message per outcome
+_EXECUTION_EXIT_OUTCOMES = MappingProxyType({
+    "complete": (
+        "COMPLETE",
+        "Stage 2 completed successfully with 100% test pass rate. All {total} tests are passing.",
+        "complete_suite",
+        "Returning complete test suite - all tests passing",
+    ),
+    "acceptable": (
+        "ACCEPTABLE",
+        "Stage 2 completed with {rate:.1f}% success rate. {passing}/{total} tests passing.",
+        "passing_tests_only",
+        "Returning {passing} passing tests only",
+    ),
+    "partial": (
+        "PARTIAL",
+        "Stage 2 completed with {rate:.1f}% success rate. {failing} tests still failing.",
+        "passing_tests_only",
+        "Returning {passing} passing tests only",
+    ),
+})
+
+
 def exit_execution_loop(
     final_success_rate: float,
     exit_reason: str,
@@ -121,50 +225,72 @@ def exit_execution_loop(
     Returns:
         Dictionary with exit confirmation and system readiness
     """
-    logger.info(f"Exiting execution loop: {exit_reason}")
-    logger.info(f"Final success rate: {final_success_rate:.1f}%")
+    logger.info("Exiting execution loop: %s", exit_reason)
+    logger.info("Final success rate: %.1f%%", final_success_rate)
     
-    # Determine system readiness based on final results
+    # Determine system readiness and what to return to the user
     if tests_still_failing == 0:
-        system_status = "COMPLETE"
-        message = f"Stage 2 completed successfully with 100% test pass rate. All {total_tests} tests are passing."
+        outcome = "complete"
     elif final_success_rate >= EXECUTION_SUCCESS_THRESHOLD:
-        system_status = "ACCEPTABLE"
-        message = f"Stage 2 completed with {final_success_rate:.1f}% success rate. {total_tests - tests_still_failing}/{total_tests} tests passing."
-    else:
-        system_status = "PARTIAL"
-        message = f"Stage 2 completed with {final_success_rate:.1f}% success rate. {tests_still_failing} tests still failing."
-    
-    # Determine what to return to user
-    if tests_still_failing == 0:
-        return_strategy = "complete_suite"
-        return_message = "Returning complete test suite - all tests passing"
+        outcome = "acceptable"
     else:
-        return_strategy = "passing_tests_only"
-        return_message = f"Returning {total_tests - tests_still_failing} passing tests only"
+        outcome = "partial"
+    system_status, message_template, return_strategy, return_message_template = _EXECUTION_EXIT_OUTCOMES[outcome]
+    passing_tests = total_tests - tests_still_failing
     
     result = {
-        "stage2_complete": True,
-        "system_complete": True,
+        **_EXECUTION_EXIT_RESULT_BASE,
         "final_success_rate": final_success_rate,
         "exit_reason": exit_reason,
         "system_status": system_status,
-        "completion_message": message,
+        "completion_message": message_template.format(
+            rate=final_success_rate, total=total_tests, passing=passing_tests, failing=tests_still_failing
+        ),
         "return_strategy": return_strategy,
-        "return_message": return_message,
+        "return_message": return_message_template.format(passing=passing_tests),
         "tests_summary": {
             "total": total_tests,
-            "passing": total_tests - tests_still_failing,
+            "passing": passing_tests,
             "failing": tests_still_failing
         },
-        "ready_for_reporting": True,
-        "timestamp": "execution_loop_exit"
     }
     
-    logger.info(f"Execution loop exit complete: {system_status} status")
+    logger.info("Execution loop exit complete: %s status", system_status)
     return result
 
 
+class ImprovementReport(NamedTuple):
+    """Execution quality improvement between two iterations."""
+    improvement_absolute: float
+    improvement_percentage: float
+    status: str
+    recommendation: str
+    previous_success_rate: float
+    current_success_rate: float
+    iteration: int
+
+
+# Improvement bands: an improvement above _IMPROVEMENT_THRESHOLDS[i - 1] and at most
+# _IMPROVEMENT_THRESHOLDS[i] maps to _IMPROVEMENT_STATUSES[i]. Changes within the
+# tolerance around zero are rounding noise from the percentage math.
+_IMPROVEMENT_TOLERANCE = 1e-9
+_IMPROVEMENT_THRESHOLDS = (-_IMPROVEMENT_TOLERANCE, _IMPROVEMENT_TOLERANCE, 5.0, 10.0)
+_IMPROVEMENT_STATUSES = (
+    "regression",
+    "no_improvement",
+    "minor_improvement",
+    "good_improvement",
+    "significant_improvement",
+)
+_IMPROVEMENT_RECOMMENDATIONS = (
+    "Investigation needed - success rate decreased",
+    "Consider stopping - no progress detected",
+    "Continue optimization - slow but steady progress",
+    "Continue optimization - good progress",
+    "Continue optimization - excellent progress",
+)
+
+
 def analyze_execution_improvement(
     previous_success_rate: float,
     current_success_rate: float,
@@ -181,40 +307,39 @@ def analyze_execution_improvement(
     Returns:
         Dictionary with improvement analysis
     """
-    logger.info(f"Analyzing execution improvement for iteration {iteration_count}")
+    logger.info("Analyzing execution improvement for iteration %s", iteration_count)
     
     improvement = current_success_rate - previous_success_rate
     improvement_rate = (improvement / previous_success_rate * 100) if previous_success_rate > 0 else 0
     
-    if improvement > 10.0:
-        status = "significant_improvement"
-        recommendation = "Continue optimization - excellent progress"
-    elif improvement > 5.0:
-        status = "good_improvement"
-        recommendation = "Continue optimization - good progress"
-    elif improvement > 0:
-        status = "minor_improvement"
-        recommendation = "Continue optimization - slow but steady progress"
-    elif improvement == 0:
-        status = "no_improvement"
-        recommendation = "Consider stopping - no progress detected"
-    else:
-        status = "regression"
-        recommendation = "Investigation needed - success rate decreased"
+    band = bisect.bisect_left(_IMPROVEMENT_THRESHOLDS, improvement)
+    report = ImprovementReport(
+        improvement_absolute=improvement,
+        improvement_percentage=improvement_rate,
+        status=_IMPROVEMENT_STATUSES[band],
+        recommendation=_IMPROVEMENT_RECOMMENDATIONS[band],
+        previous_success_rate=previous_success_rate,
+        current_success_rate=current_success_rate,
+        iteration=iteration_count
+    )
     
-    result = {
-        "improvement_absolute": improvement,
-        "improvement_percentage": improvement_rate,
-        "status": status,
-        "recommendation": recommendation,
-        "previous_success_rate": previous_success_rate,
-        "current_success_rate": current_success_rate,
-        "iteration": iteration_count
-    }
-    
-    logger.debug(f"Execution improvement: {improvement:.2f}% absolute, {improvement_rate:.2f}% relative")
+    logger.debug("Execution improvement: %.2f%% absolute, %.2f%% relative", improvement, improvement_rate)
     
-    return result
+    # Tool results are returned to the model as JSON objects
+    return report._asdict()
+
+
+# Fields of the prepare_final_test_suite result fixed by the return strategy
+_COMPLETE_SUITE_SCAFFOLD = MappingProxyType({
+    "include_failing_tests": True,
+    "quality_note": "Includes both passing and failing tests",
+    "preparation_complete": True
+})
+_PASSING_SUITE_SCAFFOLD = MappingProxyType({
+    "include_failing_tests": False,
+    "quality_note": "Excludes {failing} failing tests",
+    "preparation_complete": True
+})
 
 
 def prepare_final_test_suite(
@@ -231,7 +356,7 @@ def prepare_final_test_suite(
     Returns:
         Dictionary with final test suite preparation instructions
     """
-    logger.info(f"Preparing final test suite with strategy: {return_strategy}")
+    logger.info("Preparing final test suite with strategy: %s", return_strategy)
     
     total_tests = test_status_summary.get("total_tests", 0)
     passing_tests = test_status_summary.get("tests_ready", 0)
@@ -239,28 +364,27 @@ def prepare_final_test_suite(
     
     if return_strategy == "complete_suite":
         # Return all tests, including failing ones (for debugging)
-        include_failing = True
+        scaffold = _COMPLETE_SUITE_SCAFFOLD
+        included_failing = failing_tests
         suite_description = f"Complete test suite with {total_tests} tests"
-        quality_note = "Includes both passing and failing tests"
     else:
         # Return only passing tests (production ready)
-        include_failing = False
+        scaffold = _PASSING_SUITE_SCAFFOLD
+        included_failing = 0
         suite_description = f"Production-ready test suite with {passing_tests} passing tests"
-        quality_note = f"Excludes {failing_tests} failing tests"
     
     result = {
+        **scaffold,
         "return_strategy": return_strategy,
-        "include_failing_tests": include_failing,
         "suite_description": suite_description,
-        "quality_note": quality_note,
+        "quality_note": scaffold["quality_note"].format(failing=failing_tests),
         "tests_to_include": {
             "passing": passing_tests,
-            "failing": failing_tests if include_failing else 0,
-            "total": passing_tests + (failing_tests if include_failing else 0)
+            "failing": included_failing,
+            "total": passing_tests + included_failing
         },
-        "preparation_complete": True
     }
     
-    logger.info(f"Final suite prepared: {result['tests_to_include']['total']} tests to include")
+    logger.info("Final suite prepared: %s tests to include", result['tests_to_include']['total'])
     
     return result
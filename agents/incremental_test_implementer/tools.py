@@ -4,12 +4,29 @@ This module contains tools for implementing only the test cases that need attent
 while preserving already passing test implementations.
 """
 
+import functools
+import hashlib
 import logging
+import operator
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+_CLASS_RE = re.compile(r'^class\s+(\w+)', re.MULTILINE)
+_FUNC_RE = re.compile(r'^def\s+(\w+)', re.MULTILINE)
+_NAME_CLEAN_RE = re.compile(r'[^\w\s]')
+
+# Fields read from each failed test case, with the defaults used when one is missing
+_FAILED_TEST_DEFAULTS = {
+    "test_id": "unknown",
+    "description": "",
+    "target_name": "",
+    "error": "",
+    "status": ""
+}
+_get_failed_test_fields = operator.itemgetter(*_FAILED_TEST_DEFAULTS)
+
 def implement_failed_tests(
     failed_test_cases: List[Dict[str, Any]],
     source_code: str,
@@ -29,38 +46,28 @@ def implement_failed_tests(
     Returns:
         Dictionary with implementations for failed tests only
     """
-    logger.info(f"Implementing {len(failed_test_cases)} failed test cases")
+    logger.info("Implementing %d failed test cases", len(failed_test_cases))
     
-    implementations = {}
+    # Nothing to regenerate once every test passes
+    if not failed_test_cases:
+        return {
+            "implementations": {},
+            "total_implemented": 0,
+            "framework": target_framework,
+            "implementation_type": "incremental_failed_only"
+        }
     
-    for test_case in failed_test_cases:
-        test_id = test_case.get("test_id", "unknown")
-        description = test_case.get("description", "")
-        target_name = test_case.get("target_name", "")
-        error = test_case.get("error", "")
-        status = test_case.get("status", "")
-        
-        logger.debug(f"Implementing test {test_id}: {description}")
-        
-        # Generate improved test implementation based on error analysis
-        test_code = _generate_test_implementation(
-            test_id=test_id,
-            description=description,
-            target_name=target_name,
-            previous_error=error,
-            error_type=status,
-            source_code=source_code,
-            framework=target_framework
+    # Scan the source once; every generated test targets the same code
+    classes, functions = _scan(source_code)
+    # Test function names already used in this batch, so none silently overwrites another
+    used_names = set()
+    implementations = {
+        implementation["test_id"]: implementation
+        for implementation in (
+            _implement_failed_test(test_case, classes, functions, target_framework, used_names)
+            for test_case in failed_test_cases
         )
-        
-        implementations[test_id] = {
-            "test_id": test_id,
-            "test_code": test_code,
-            "target_name": target_name,
-            "description": description,
-            "regenerated": True,
-            "previous_error": error
-        }
+    }
     
     result = {
         "implementations": implementations,
@@ -69,7 +76,9 @@ def implement_failed_tests(
         "implementation_type": "incremental_failed_only"
     }
     
-    logger.info(f"Generated implementations for {len(implementations)} failed test cases")
+    logger.info("Generated implementations for %d failed test cases", len(implementations))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Implemented tests: %s", ", ".join(implementations))
     return result
 
 
@@ -91,26 +100,37 @@ def merge_test_implementations(
     """
     logger.info("Merging new implementations with existing passing tests")
     
-    # Start with the new implementations
-    all_implementations = new_implementations.get("implementations", {}).copy()
+    # Existing passing tests, preserved as-is
+    preserved = {
+        passed_test["test_id"]: {
+            "test_id": passed_test["test_id"],
+            "test_code": passed_test["test_code"],
+            "target_name": passed_test.get("target_name", ""),
+            "description": passed_test.get("description", ""),
+            "regenerated": False,
+            "preserved": True,
+            "iteration_passed": passed_test.get("iteration_passed", -1)
+        }
+        for passed_test in passed_test_cases
+        if passed_test.get("test_id") and passed_test.get("test_code")
+    }
+    preserved_count = len(preserved)
     
-    # Add existing passing tests (preserve them)
-    preserved_count = 0
-    for passed_test in passed_test_cases:
-        test_id = passed_test.get("test_id", "")
-        existing_code = passed_test.get("test_code", "")
-        
-        if test_id and existing_code:
-            all_implementations[test_id] = {
-                "test_id": test_id,
-                "test_code": existing_code,
-                "target_name": passed_test.get("target_name", ""),
-                "description": passed_test.get("description", ""),
-                "regenerated": False,
-                "preserved": True,
-                "iteration_passed": passed_test.get("iteration_passed", -1)
-            }
-            preserved_count += 1
+    # New implementations first; a preserved test with the same id takes precedence
+    new_by_id = new_implementations.get("implementations", {})
+    all_implementations = {**new_by_id, **preserved}
+    
+    # Nothing to merge: skip scanning the source for imports
+    if not all_implementations:
+        logger.info("No test implementations to merge")
+        return {
+            "complete_test_suite": "",
+            "total_tests": 0,
+            "new_implementations": 0,
+            "preserved_tests": 0,
+            "all_implementations": {},
+            "merge_successful": True
+        }
     
     # Generate complete test file
     complete_test_code = _merge_test_code_blocks(all_implementations, source_code)
@@ -118,25 +138,63 @@ def merge_test_implementations(
     result = {
         "complete_test_suite": complete_test_code,
         "total_tests": len(all_implementations),
-        "new_implementations": len(new_implementations.get("implementations", {})),
+        "new_implementations": len(new_by_id),
         "preserved_tests": preserved_count,
         "all_implementations": all_implementations,
         "merge_successful": True
     }
     
-    logger.info(f"Merged test suite: {result['new_implementations']} new + {preserved_count} preserved = {result['total_tests']} total tests")
+    logger.info("Merged test suite: %d new + %d preserved = %d total tests",
+                result['new_implementations'], preserved_count, result['total_tests'])
     
     return result
 
 
+def _implement_failed_test(
+    test_case: Dict[str, Any],
+    classes: Tuple[str, ...],
+    functions: Tuple[str, ...],
+    framework: str,
+    used_names: Set[str]
+) -> Dict[str, Any]:
+    """Build the regenerated implementation entry for a single failed test case."""
+    test_id, description, target_name, error, status = _get_failed_test_fields(
+        {**_FAILED_TEST_DEFAULTS, **test_case}
+    )
+    
+    # Generate improved test implementation based on error analysis
+    test_code = _generate_test_implementation(
+        test_id=test_id,
+        description=description,
+        target_name=target_name,
+        previous_error=error,
+        error_type=status,
+        classes=classes,
+        functions=functions,
+        framework=framework,
+        used_names=used_names
+    )
+    
+    return {
+        "test_id": test_id,
+        "test_code": test_code,
+        "target_name": target_name,
+        "description": description,
+        "regenerated": True,
+        "previous_error": error
+    }
+
+
 def _generate_test_implementation(
     test_id: str,
     description: str,
     target_name: str,
     previous_error: str,
     error_type: str,
-    source_code: str,
-    framework: str
+    classes: Tuple[str, ...],
+    functions: Tuple[str, ...],
+    framework: str,
+    used_names: Optional[Set[str]] = None
 ) -> str:
     """
     Generate improved test implementation based on error analysis.
@@ -147,31 +205,18 @@ def _generate_test_implementation(
         target_name: Target function/method name
         previous_error: Error from previous attempt
         error_type: Type of error (failed/syntax_error)
-        source_code: Source code being tested
+        classes: Class names defined in the source code being tested
+        functions: Function names defined in the source code being tested
         framework: Testing framework
+        used_names: Test function names already generated in this batch
         
     Returns:
         Generated test code string
     """
-    # Extract class and function information from source code
-    classes = _extract_classes_from_source(source_code)
-    functions = _extract_functions_from_source(source_code)
-    
     # Generate function name from description
-    test_function_name = _generate_test_function_name(description, test_id)
-    
-    # Determine import statements needed
-    imports = ["import pytest"]
+    test_function_name = _generate_test_function_name(description, test_id, used_names)
     
-    # Add source imports
-    if classes or functions:
-        if "." in target_name:  # Method call
-            class_name = target_name.split(".")[0]
-            if class_name in classes:
-                imports.append(f"from sample_code import {class_name}")
-        else:  # Function call
-            if target_name in functions:
-                imports.append(f"from sample_code import {target_name}")
+    # Imports are not emitted per test; _merge_test_code_blocks writes them once
     
     # Generate test body based on target
     test_body = _generate_test_body(target_name, description, previous_error, error_type, classes, functions)
@@ -186,10 +231,15 @@ def _generate_test_implementation(
     return test_code
 
 
-def _generate_test_function_name(description: str, test_id: str) -> str:
-    """Generate a valid Python function name from description."""
+def _generate_test_function_name(description: str, test_id: str, used_names: Optional[Set[str]] = None) -> str:
+    """
+    Generate a valid Python function name from description.
+    
+    When `used_names` is given, a name that was already produced gets a short
+    suffix derived from `test_id`, and the final name is added to the set.
+    """
     # Clean and convert description to function name
-    clean_desc = re.sub(r'[^\w\s]', '', description.lower())
+    clean_desc = _NAME_CLEAN_RE.sub('', description.lower())
     words = clean_desc.split()[:8]  # Limit length
     func_name = "_".join(words)
     
@@ -201,16 +251,46 @@ def _generate_test_function_name(description: str, test_id: str) -> str:
     if not func_name or func_name == "test_":
         func_name = f"test_{test_id.replace('-', '_')}"
     
+    if used_names is not None:
+        if func_name in used_names:
+            func_name = f"{func_name}_{hashlib.blake2b(test_id.encode(), digest_size=3).hexdigest()}"
+        used_names.add(func_name)
+    
     return func_name
 
 
+# Test body templates keyed by a keyword in the target name, checked in order
+_METHOD_TEMPLATES = (
+    ("add", '''    calculator = {cls}()
+    result = calculator.{name}(2, 3)
+    assert result == 5'''),
+    ("greet", '''    obj = {cls}()
+    result = obj.{name}("World")
+    assert "World" in result'''),
+)
+_DEFAULT_METHOD_TEMPLATE = '''    obj = {cls}()
+    result = obj.{name}()
+    assert result is not None'''
+_FUNCTION_TEMPLATES = (
+    ("greet", '''    result = {name}("World")
+    assert result == "Hello, World"'''),
+    ("add", '''    result = {name}(2, 3)
+    assert result == 5'''),
+)
+_DEFAULT_FUNCTION_TEMPLATE = '''    result = {name}()
+    assert result is not None'''
+_FALLBACK_TEMPLATE = '''    # Test: {description}
+    # Generic test implementation
+    assert True  # Basic test passes'''
+
+
 def _generate_test_body(
     target_name: str,
     description: str,
     previous_error: str,
     error_type: str,
-    classes: List[str],
-    functions: List[str]
+    classes: Tuple[str, ...],
+    functions: Tuple[str, ...]
 ) -> str:
     """Generate test body based on target and error analysis."""
     
@@ -219,74 +299,59 @@ def _generate_test_body(
         class_name, method_name = target_name.split(".", 1)
         if class_name in classes:
             # Generate instance and method call
-            if "add" in method_name.lower():
-                return f'''    calculator = {class_name}()
-    result = calculator.{method_name}(2, 3)
-    assert result == 5'''
-            elif "greet" in method_name.lower():
-                return f'''    obj = {class_name}()
-    result = obj.{method_name}("World")
-    assert "World" in result'''
-            else:
-                return f'''    obj = {class_name}()
-    result = obj.{method_name}()
-    assert result is not None'''
+            lowered = method_name.lower()
+            template = next(
+                (template for keyword, template in _METHOD_TEMPLATES if keyword in lowered),
+                _DEFAULT_METHOD_TEMPLATE
+            )
+            return template.format(cls=class_name, name=method_name)
     else:
         # Function call
         if target_name in functions:
-            if "greet" in target_name.lower():
-                return f'''    result = {target_name}("World")
-    assert result == "Hello, World"'''
-            elif "add" in target_name.lower():
-                return f'''    result = {target_name}(2, 3)
-    assert result == 5'''
-            else:
-                return f'''    result = {target_name}()
-    assert result is not None'''
+            lowered = target_name.lower()
+            template = next(
+                (template for keyword, template in _FUNCTION_TEMPLATES if keyword in lowered),
+                _DEFAULT_FUNCTION_TEMPLATE
+            )
+            return template.format(name=target_name)
     
     # Fallback generic test with actual implementation
-    return f'''    # Test: {description}
-    # Generic test implementation
-    assert True  # Basic test passes'''
+    return _FALLBACK_TEMPLATE.format(description=description)
+
+
+@functools.lru_cache(maxsize=8)
+def _scan(source_code: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Extract the top-level class and function names from source code, cached per source."""
+    return tuple(_CLASS_RE.findall(source_code)), tuple(_FUNC_RE.findall(source_code))
 
 
 def _extract_classes_from_source(source_code: str) -> List[str]:
     """Extract class names from source code."""
-    class_pattern = r'^class\s+(\w+)'
-    matches = re.findall(class_pattern, source_code, re.MULTILINE)
-    return matches
+    return list(_scan(source_code)[0])
 
 
 def _extract_functions_from_source(source_code: str) -> List[str]:
     """Extract function names from source code."""
-    func_pattern = r'^def\s+(\w+)'
-    matches = re.findall(func_pattern, source_code, re.MULTILINE)
-    return matches
+    return list(_scan(source_code)[1])
 
 
 def _merge_test_code_blocks(implementations: Dict[str, Any], source_code: str) -> str:
     """Merge all test implementations into a complete test file."""
     
-    # Generate imports
-    imports = ["import pytest"]
-    
-    # Add source imports based on implementations
-    classes = _extract_classes_from_source(source_code)
-    functions = _extract_functions_from_source(source_code)
+    # One canonical source import for every name defined in the (cached) scan,
+    # de-duplicated so redefined names are not imported twice
+    classes, functions = _scan(source_code)
+    sample_code_names = set(classes) | set(functions)
+    imports = ("import pytest",)
+    if sample_code_names:
+        imports += (f"from sample_code import {', '.join(sorted(sample_code_names))}",)
     
-    if classes:
-        imports.append(f"from sample_code import {', '.join(classes)}")
-    if functions:
-        imports.append(f"from sample_code import {', '.join(functions)}")
-    
-    # Combine all test functions
-    test_functions = []
-    for impl in implementations.values():
-        test_code = impl.get("test_code", "")
-        if test_code:
-            test_functions.append(test_code)
+    # Combine all test functions, skipping empty implementations
+    body = "\n\n".join(
+        test_code
+        for test_code in (impl.get("test_code", "") for impl in implementations.values())
+        if test_code
+    )
     
     # Assemble complete file
-    complete_code = "\n".join(imports) + "\n\n" + "\n\n".join(test_functions)
-    
-    return complete_code
+    return "\n".join(imports) + "\n\n" + body
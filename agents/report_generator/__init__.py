@@ -3,6 +3,6 @@
 This package contains the report generator agent for creating comprehensive test reports.
 """
 
-from .agent import report_generator_agent, create_report_generator_agent
+from .agent import create_report_generator_agent, __getattr__
 
 __all__ = ['report_generator_agent', 'create_report_generator_agent']
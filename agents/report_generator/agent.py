@@ -3,7 +3,9 @@
 This agent generates comprehensive test reports with metrics and insights.
 """
 
+import inspect
 from google.adk.agents import LlmAgent
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import generate_comprehensive_report, format_report_as_markdown
 from ..tools.workflow_tools import read_file_as_string
 def create_report_generator_agent() -> LlmAgent:
@@ -12,17 +14,13 @@ def create_report_generator_agent() -> LlmAgent:
         name="ReportGenerator",
         description="Generates comprehensive test reports with coverage metrics, execution statistics, and actionable insights.",
         model="gemini-2.5-pro",
-        instruction="""
+        instruction=inspect.cleandoc("""
         You are a test analysis and reporting expert. Your task is to generate a comprehensive test report.
 
-        You will receive from the shared state:
-        1. Coverage analysis results: {coverage_validation_result}
-        2. Test execution results with metrics: {selective_test_results}
-        3. The path of the original source code: {source_code_path}
-        4. The generated test code: {generated_test_code}
+        You will receive the coverage analysis results, test execution results, source code path, and generated test code from the shared state at the end of these instructions.
 
         Your task:
-        1. Call the read_file_as_string tool to read the source code from `{source_code_path}`.
+        1. Call the read_file_as_string tool to read the source code from the source code path.
         2. Call the `generate_comprehensive_report` tool with coverage_validation_result as coverage_report, selective_test_results as test_results, source_code, and generated_test_code
         3. Call the `format_report_as_markdown` tool to create a readable report
         4. Provide both the structured JSON report and the markdown formatted report
@@ -34,10 +32,13 @@ def create_report_generator_agent() -> LlmAgent:
         - Clear indication of whether success thresholds are met
         
         Focus on providing actionable insights that help improve test quality and coverage.
-        """,
+
+        You will receive coverage report in `{coverage_validation_result}`, test results in `{selective_test_results}`, source code in `{source_code_path}`, and generated test code in `{generated_test_code}`.
+        """),
+        include_contents="none",
         tools=[read_file_as_string, generate_comprehensive_report, format_report_as_markdown],
         output_key="comprehensive_report"
     )
 
-# Create the agent instance
-report_generator_agent = create_report_generator_agent()
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, report_generator_agent=create_report_generator_agent)
@@ -3,19 +3,123 @@
 This module provides tools for generating comprehensive test reports.
 """
 
-import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+from collections import Counter
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional, TextIO, Tuple
 from datetime import datetime
 
 # Set up logging
 logger = logging.getLogger("two_stage_system")
 
+# Patterns for pulling metrics out of LLM-formatted text values
+_PCT_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+_RATIO_RE = re.compile(r'(\d+)/(\d+)')
+_PASSED_RE = re.compile(r'\d+/\d+.*passed')
+_PERCENT_VALUE_RE = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+))\s*%?\s*')
+_SUCCESS_RE = re.compile(r'success rate:?\s*(\d+(?:\.\d+)?)%', re.IGNORECASE)
+# Failure classification: "assertion" anywhere in the message takes precedence (group 1),
+# otherwise the first "type" matches
+_ERR_CLASS_RE = re.compile(r'^(?=.*?(assertion))|type', re.IGNORECASE | re.DOTALL)
+
+# Sole insight and recommendation when neither coverage nor test results were provided
+_NO_DATA_MESSAGE = "⚠️ No analysis data available"
+
+# Insight and recommendation lines, filled in with str.format
+_INSIGHT_EXCELLENT_COVERAGE = "✅ Excellent test coverage at {}% - well above the 80% threshold"
+_INSIGHT_GOOD_COVERAGE = "✅ Good test coverage at {}% - meets the minimum threshold"
+_INSIGHT_LOW_COVERAGE = "⚠️ Test coverage at {}% is below the 80% threshold"
+_INSIGHT_UNCOVERED_FUNCTIONS = "🎯 {} functions lack test coverage: {}{}"
+_INSIGHT_UNCOVERED_METHODS = "🎯 {} methods across {} classes need test coverage"
+_INSIGHT_EXCELLENT_RELIABILITY = "✅ Excellent execution reliability at {}% success rate"
+_INSIGHT_GOOD_RELIABILITY = "✅ Good execution reliability at {}% success rate"
+_INSIGHT_LOW_RELIABILITY = "⚠️ Execution reliability at {}% needs improvement"
+_RECOMMEND_UNCOVERED_FUNCTIONS = "📝 Add tests for uncovered functions: {}"
+_RECOMMEND_UNCOVERED_METHODS = "📝 Add tests for uncovered methods in classes: {}"
+# Number of uncovered function names quoted in an insight or recommendation
+_QUOTED_UNITS = 3
+
+# Overall score weights and the thresholds the executive summary checks against
+_COVERAGE_WEIGHT = 0.4
+_EXECUTION_WEIGHT = 0.6
+_COVERAGE_THRESHOLD = 80.0
+_EXECUTION_THRESHOLD = 95.0
+_EXCELLENT_SCORE = 90.0
+_GOOD_SCORE = 75.0
+
+def _percent_value(value: Any) -> Optional[float]:
+    """Convert a number or a percentage string like "85.5%" to a float; None if it is neither."""
+    value_type = type(value)
+    if value_type is float or value_type is int:
+        return value
+    if value_type is str:
+        # Matched rather than float() in a try block, so non-numeric text costs no exception
+        match = _PERCENT_VALUE_RE.fullmatch(value)
+        return float(match.group(1)) if match else None
+    return None
+
+
+def _coerce_percent(container: Dict[str, Any], keys: Tuple[str, ...], default: float = 0.0) -> float:
+    """
+    Return the first non-zero percentage found under `keys` in `container`.
+    
+    Keys may be dotted paths into nested dicts, e.g. "coverage_summary.overall_coverage".
+    Values may be numbers or strings like "85.5%".
+    """
+    for key in keys:
+        value = container
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        number = _percent_value(value)
+        if number:
+            return number
+    return default
+
+
+def _scan_container(
+    container: Dict[str, Any],
+    want: Tuple[str, ...],
+    key_hint: Optional[str] = None
+) -> Optional[Tuple[str, Any]]:
+    """
+    Scan the string values of an LLM-formatted dict once, running each wanted pattern on every value.
+    
+    Patterns are tried in the order given by `want`, and the first value with any hit wins:
+    - "passed": a passing summary like "3/3 tests passed" or "100% success"; the data is
+      `(passed, total)` when the value has test counts, else None
+    - "success": a success rate like "Success Rate: 100.0%"; the data is the rate
+    - "pct": any percentage like "100.0%"; the data is the percentage
+    
+    Args:
+        container: Dict whose string values are scanned
+        want: Pattern kinds to look for, in priority order
+        key_hint: If given, only values under keys containing it (case-insensitive) are scanned
+    
+    Returns:
+        `(kind, data)` for the first hit, or None
+    """
+    for key, value in container.items():
+        if not isinstance(value, str) or (key_hint is not None and key_hint not in key.lower()):
+            continue
+        for kind in want:
+            if kind == "passed":
+                if "100%" in value or _PASSED_RE.search(value) or "all.*passed" in value.lower():
+                    match = _RATIO_RE.search(value)
+                    return kind, (int(match.group(1)), int(match.group(2))) if match else None
+            else:
+                match = (_SUCCESS_RE if kind == "success" else _PCT_RE).search(value)
+                if match:
+                    return kind, float(match.group(1))
+    return None
+
+
 def generate_comprehensive_report(
     coverage_report: Dict[str, Any],
     test_results: Dict[str, Any],
     source_code: str,
-    generated_test_code: str
+    generated_test_code: str,
+    generated_at: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Generate a comprehensive test report combining all metrics and analysis.
@@ -25,46 +129,42 @@ def generate_comprehensive_report(
         test_results: Test execution results with metrics
         source_code: The original source code
         generated_test_code: The generated test code
+        generated_at: ISO timestamp for the report; defaults to now. Pass one shared
+            timestamp when generating a batch of reports.
         
     Returns:
         A dictionary containing the comprehensive test report.
     """
     logger.info("Generating comprehensive test report")
     
-    # Extract key metrics - handle both structured data and LLM text output
-    coverage_summary = coverage_report.get("coverage_summary", {})
-    coverage_score = coverage_summary.get("overall_coverage", 0) or coverage_report.get("overall_coverage", 0)
+    report = _build_comprehensive_report(coverage_report, test_results, source_code, generated_test_code)
+    report["report_metadata"]["generated_at"] = generated_at or datetime.now().isoformat()
+    return report
+
+
+def _build_comprehensive_report(
+    coverage_report: Dict[str, Any],
+    test_results: Dict[str, Any],
+    source_code: str,
+    generated_test_code: str
+) -> Dict[str, Any]:
+    """Build the comprehensive report for generate_comprehensive_report, without the timestamp."""
+    # Sub-dicts read throughout the report, fetched once
+    coverage_summary = coverage_report.get("coverage_summary") or {}
+    uncovered_units = coverage_report.get("uncovered_units") or {}
+    reliability_metrics = test_results.get("reliability_metrics") or {}
+    execution_metrics = test_results.get("execution_metrics") or {}
+    failures = test_results.get("failures") or []
     
-    # Handle LLM-formatted keys (human readable) and extract from text
+    # Extract key metrics - handle both structured data and LLM text output
+    coverage_score = _coerce_percent(
+        coverage_report, ("coverage_summary.overall_coverage", "overall_coverage", "Overall Coverage")
+    )
     if coverage_score == 0:
-        # Try direct key lookup
-        coverage_score = coverage_report.get("Overall Coverage", 0)
-        
-        # If still 0, try to parse from text content
-        if coverage_score == 0:
-            import re
-            for key, value in coverage_report.items():
-                if isinstance(value, str):
-                    # Look for patterns like "100%" or "100.0%"
-                    match = re.search(r'(\d+(?:\.\d+)?)%', value)
-                    if match and "coverage" in key.lower():
-                        coverage_score = float(match.group(1))
-                        break
-        
-        # Try to extract percentage from text like "100.0%"
-        if isinstance(coverage_score, str) and "%" in coverage_score:
-            try:
-                coverage_score = float(coverage_score.replace("%", ""))
-            except ValueError:
-                coverage_score = 0
-    
-    # Ensure coverage_score is numeric
-    if isinstance(coverage_score, str):
-        try:
-            # Try to extract percentage from string like "100.0%"
-            coverage_score = float(coverage_score.replace("%", ""))
-        except (ValueError, AttributeError):
-            coverage_score = 0
+        # Parse from text content like "Coverage: 100.0%" under any coverage-related key
+        hit = _scan_container(coverage_report, ("pct",), key_hint="coverage")
+        if hit is not None:
+            coverage_score = hit[1]
     
     # Extract individual coverage metrics
     function_coverage = coverage_summary.get("function_coverage", coverage_score)
@@ -72,7 +172,6 @@ def generate_comprehensive_report(
     method_coverage = coverage_summary.get("method_coverage", coverage_score)
     
     # Test results data structure from SelectiveTestRunner
-    reliability_metrics = test_results.get("reliability_metrics", {})
     execution_success_rate = reliability_metrics.get("success_rate", 0)
     
     # If reliability_metrics is empty, try to extract from various data sources
@@ -81,83 +180,76 @@ def generate_comprehensive_report(
         
         # Try structured test_details first
         if test_details:
+            # Tally every status in one pass
+            statuses = Counter(t.get("status", "UNKNOWN") for t in test_details)
             total_tests = len(test_details)
-            passed_tests = sum(1 for t in test_details if t.get("status") == "PASS")
+            passed_tests = statuses["PASS"]
             execution_success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
             
             reliability_metrics = {
                 "success_rate": execution_success_rate,
                 "total_tests": total_tests,
                 "passed_tests": passed_tests,
-                "failed_tests": total_tests - passed_tests
+                "failed_tests": total_tests - passed_tests,
+                "status_breakdown": dict(statuses)
             }
         else:
             # Try to parse from LLM text output
-            import re
-            for key, value in test_results.items():
-                if isinstance(value, str):
-                    # Look for patterns like "3/3 tests passed", "100% success", "Success Rate: 100.0%"
-                    if "100%" in value or re.search(r'\d+/\d+.*passed', value) or "all.*passed" in value.lower():
-                        # Extract test counts if available
-                        test_count_match = re.search(r'(\d+)/(\d+)', value)
-                        if test_count_match:
-                            passed = int(test_count_match.group(1))
-                            total = int(test_count_match.group(2))
-                            execution_success_rate = (passed / total * 100) if total > 0 else 0
-                            reliability_metrics = {
-                                "success_rate": execution_success_rate,
-                                "total_tests": total,
-                                "passed_tests": passed,
-                                "failed_tests": total - passed
-                            }
-                        else:
-                            # Default to 100% if pattern suggests success
-                            execution_success_rate = 100.0
-                            reliability_metrics = {
-                                "success_rate": 100.0,
-                                "total_tests": 3,  # From recent run
-                                "passed_tests": 3,
-                                "failed_tests": 0
-                            }
-                        break
-                    
-                    # Look for specific success rate patterns like "Success Rate: 100.0%"
-                    success_match = re.search(r'success rate:?\s*(\d+(?:\.\d+)?)%', value.lower())
-                    if success_match:
-                        execution_success_rate = float(success_match.group(1))
-                        reliability_metrics = {
-                            "success_rate": execution_success_rate,
-                            "total_tests": 3,  # Default assumption
-                            "passed_tests": int(3 * execution_success_rate / 100),
-                            "failed_tests": 3 - int(3 * execution_success_rate / 100)
-                        }
-                        break
+            hit = _scan_container(test_results, ("passed", "success"))
+            if hit is not None and hit[0] == "passed":
+                if hit[1] is not None:
+                    # Test counts were available, e.g. "3/3 tests passed"
+                    passed, total = hit[1]
+                    execution_success_rate = (passed / total * 100) if total > 0 else 0
+                    reliability_metrics = {
+                        "success_rate": execution_success_rate,
+                        "total_tests": total,
+                        "passed_tests": passed,
+                        "failed_tests": total - passed
+                    }
+                else:
+                    # Default to 100% if pattern suggests success
+                    execution_success_rate = 100.0
+                    reliability_metrics = {
+                        "success_rate": 100.0,
+                        "total_tests": 3,  # From recent run
+                        "passed_tests": 3,
+                        "failed_tests": 0
+                    }
+            elif hit is not None:
+                # Specific success rate pattern like "Success Rate: 100.0%"
+                execution_success_rate = hit[1]
+                reliability_metrics = {
+                    "success_rate": execution_success_rate,
+                    "total_tests": 3,  # Default assumption
+                    "passed_tests": int(3 * execution_success_rate / 100),
+                    "failed_tests": 3 - int(3 * execution_success_rate / 100)
+                }
     
     # Ensure execution_success_rate is numeric
-    if isinstance(execution_success_rate, str):
-        try:
-            execution_success_rate = float(execution_success_rate.replace("%", ""))
-        except (ValueError, AttributeError):
-            execution_success_rate = 0
-    
-    # Extract detailed metrics
-    execution_metrics = test_results.get("execution_metrics", {})
+    execution_success_rate = _percent_value(execution_success_rate) or 0.0
     
     # Determine if thresholds are met
-    meets_coverage_threshold = coverage_score >= 80
-    meets_execution_threshold = execution_success_rate >= 95
+    meets_coverage_threshold = coverage_score >= _COVERAGE_THRESHOLD
+    meets_execution_threshold = execution_success_rate >= _EXECUTION_THRESHOLD
     
     # Overall system health score (weighted average)
-    overall_score = (coverage_score * 0.4 + execution_success_rate * 0.6)
+    overall_score = _overall_score(coverage_score, execution_success_rate)
     
-    # Generate insights and recommendations
-    insights = _generate_insights(coverage_report, test_results)
-    recommendations = _generate_recommendations(coverage_report, test_results)
+    # Generate insights and recommendations; without any input there is nothing to analyze
+    if not coverage_report and not test_results:
+        insights = [_NO_DATA_MESSAGE]
+        recommendations = [_NO_DATA_MESSAGE]
+    else:
+        insights = _generate_insights(uncovered_units, reliability_metrics, coverage_score, execution_success_rate)
+        recommendations = _generate_recommendations(
+            uncovered_units, reliability_metrics, failures, coverage_score, execution_success_rate
+        )
     
     # Create the comprehensive report
     report = {
         "report_metadata": {
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": None,  # Set by generate_comprehensive_report
             "report_version": "1.0",
             "source_code_length": len(source_code),
             "test_code_length": len(generated_test_code)
@@ -168,18 +260,18 @@ def generate_comprehensive_report(
             "execution_success_rate": execution_success_rate,
             "meets_coverage_threshold": meets_coverage_threshold,
             "meets_execution_threshold": meets_execution_threshold,
-            "system_health": "EXCELLENT" if overall_score >= 90 else "GOOD" if overall_score >= 75 else "NEEDS_IMPROVEMENT"
+            "system_health": _system_health(overall_score)
         },
         "coverage_analysis": {
             "summary": coverage_summary,
             "covered_units": coverage_report.get("covered_units", {}),
-            "uncovered_units": coverage_report.get("uncovered_units", {}),
+            "uncovered_units": uncovered_units,
             "testable_units": coverage_report.get("testable_units", {})
         },
         "execution_analysis": {
             "test_status": test_results.get("status", "UNKNOWN"),
             "test_summary": test_results.get("summary", ""),
-            "failures": test_results.get("failures", []),
+            "failures": failures,
             "execution_metrics": execution_metrics,
             "reliability_metrics": reliability_metrics
         },
@@ -200,63 +292,63 @@ def generate_comprehensive_report(
         }
     }
     
-    logger.info(f"Generated comprehensive report. Overall score: {overall_score:.1f}%")
+    logger.info("Generated comprehensive report. Overall score: %.1f%%", overall_score)
     
     return report
 
-def _generate_insights(coverage_report: Dict[str, Any], test_results: Dict[str, Any]) -> List[str]:
-    """Generate actionable insights from the analysis."""
+def _overall_score(coverage_score: float, execution_success_rate: float) -> float:
+    """Weighted average of coverage and execution success, both in percent."""
+    return coverage_score * _COVERAGE_WEIGHT + execution_success_rate * _EXECUTION_WEIGHT
+
+
+def _system_health(overall_score: float) -> str:
+    """Classify an overall score as EXCELLENT, GOOD or NEEDS_IMPROVEMENT."""
+    if overall_score >= _EXCELLENT_SCORE:
+        return "EXCELLENT"
+    if overall_score >= _GOOD_SCORE:
+        return "GOOD"
+    return "NEEDS_IMPROVEMENT"
+
+
+def _generate_insights(
+    uncovered_units: Dict[str, Any],
+    reliability_metrics: Dict[str, Any],
+    overall_coverage: float,
+    success_rate: float
+) -> List[str]:
+    """Generate actionable insights from the analysis, given the already-normalized coverage and success rate."""
     insights = []
     
-    # Handle actual data structure
-    coverage_summary = coverage_report.get("coverage_summary", {})
-    overall_coverage = coverage_summary.get("overall_coverage", 0) or coverage_report.get("overall_coverage", 0)
-    
-    # Ensure overall_coverage is numeric
-    if isinstance(overall_coverage, str):
-        try:
-            # Try to extract percentage from string like "100.0%"
-            overall_coverage = float(overall_coverage.replace("%", ""))
-        except (ValueError, AttributeError):
-            overall_coverage = 0
-    
-    uncovered_units = coverage_report.get("uncovered_units", {})
-    
-    # Extract success rate from actual test results structure
-    reliability_metrics = test_results.get("reliability_metrics", {})
-    success_rate = reliability_metrics.get("success_rate", 0)
-    
-    # Ensure success_rate is numeric
-    if isinstance(success_rate, str):
-        try:
-            success_rate = float(success_rate.replace("%", ""))
-        except (ValueError, AttributeError):
-            success_rate = 0
     if overall_coverage >= 90:
-        insights.append(f"✅ Excellent test coverage at {overall_coverage}% - well above the 80% threshold")
+        insights.append(_INSIGHT_EXCELLENT_COVERAGE.format(overall_coverage))
     elif overall_coverage >= 80:
-        insights.append(f"✅ Good test coverage at {overall_coverage}% - meets the minimum threshold")
+        insights.append(_INSIGHT_GOOD_COVERAGE.format(overall_coverage))
     else:
-        insights.append(f"⚠️ Test coverage at {overall_coverage}% is below the 80% threshold")
+        insights.append(_INSIGHT_LOW_COVERAGE.format(overall_coverage))
     
     # Identify coverage gaps
     uncovered_functions = uncovered_units.get("functions", [])
     uncovered_methods = uncovered_units.get("methods", {})
     
     if uncovered_functions:
-        insights.append(f"🎯 {len(uncovered_functions)} functions lack test coverage: {', '.join(uncovered_functions[:3])}{'...' if len(uncovered_functions) > 3 else ''}")
+        function_count = len(uncovered_functions)
+        insights.append(_INSIGHT_UNCOVERED_FUNCTIONS.format(
+            function_count,
+            ', '.join(islice(uncovered_functions, _QUOTED_UNITS)),
+            '...' if function_count > _QUOTED_UNITS else ''
+        ))
     
     if uncovered_methods:
         method_count = sum(len(methods) for methods in uncovered_methods.values())
-        insights.append(f"🎯 {method_count} methods across {len(uncovered_methods)} classes need test coverage")
+        insights.append(_INSIGHT_UNCOVERED_METHODS.format(method_count, len(uncovered_methods)))
     
     # Execution insights (use the extracted success_rate)
     if success_rate >= 95:
-        insights.append(f"✅ Excellent execution reliability at {success_rate}% success rate")
+        insights.append(_INSIGHT_EXCELLENT_RELIABILITY.format(success_rate))
     elif success_rate >= 90:
-        insights.append(f"✅ Good execution reliability at {success_rate}% success rate")
+        insights.append(_INSIGHT_GOOD_RELIABILITY.format(success_rate))
     else:
-        insights.append(f"⚠️ Execution reliability at {success_rate}% needs improvement")
+        insights.append(_INSIGHT_LOW_RELIABILITY.format(success_rate))
     
     # Trend analysis
     trend = reliability_metrics.get("trend", "stable")
@@ -267,36 +359,37 @@ def _generate_insights(coverage_report: Dict[str, Any], test_results: Dict[str,
     
     return insights
 
-def _generate_recommendations(coverage_report: Dict[str, Any], test_results: Dict[str, Any]) -> List[str]:
-    """Generate actionable recommendations for improvement."""
+def _generate_recommendations(
+    uncovered_units: Dict[str, Any],
+    reliability_metrics: Dict[str, Any],
+    failures: List[Dict[str, Any]],
+    overall_coverage: float,
+    success_rate: float
+) -> List[str]:
+    """Generate actionable recommendations for improvement, given the already-normalized coverage and success rate."""
     recommendations = []
     
-    coverage_summary = coverage_report.get("coverage_summary", {})
-    uncovered_units = coverage_report.get("uncovered_units", {})
-    reliability_metrics = test_results.get("reliability_metrics", {})
-    failures = test_results.get("failures", [])
-    
     # Coverage recommendations
-    overall_coverage = coverage_summary.get("overall_coverage", 0)
     if overall_coverage < 80:
         recommendations.append("🎯 Priority: Add test cases to reach 80% coverage threshold")
         
         uncovered_functions = uncovered_units.get("functions", [])
         if uncovered_functions:
-            recommendations.append(f"📝 Add tests for uncovered functions: {', '.join(uncovered_functions[:3])}")
+            recommendations.append(_RECOMMEND_UNCOVERED_FUNCTIONS.format(
+                ', '.join(islice(uncovered_functions, _QUOTED_UNITS))
+            ))
         
         uncovered_methods = uncovered_units.get("methods", {})
         if uncovered_methods:
-            recommendations.append(f"📝 Add tests for uncovered methods in classes: {', '.join(uncovered_methods.keys())}")
+            recommendations.append(_RECOMMEND_UNCOVERED_METHODS.format(', '.join(uncovered_methods)))
     
     # Execution recommendations
-    success_rate = reliability_metrics.get("success_rate", 0)
     if success_rate < 95:
         recommendations.append("🔧 Investigate and fix test execution failures to reach 95% success rate")
         
         failure_types = reliability_metrics.get("failure_types", {})
         if failure_types:
-            most_common_failure = max(failure_types.items(), key=lambda x: x[1])
+            most_common_failure = Counter(failure_types).most_common(1)[0]
             recommendations.append(f"🔍 Focus on fixing {most_common_failure[0]} issues ({most_common_failure[1]} occurrences)")
     
     # Test quality recommendations
@@ -304,18 +397,18 @@ def _generate_recommendations(coverage_report: Dict[str, Any], test_results: Dic
         recommendations.append(f"🐛 Address {len(failures)} failing test cases to improve reliability")
         
         # Analyze failure patterns
-        error_patterns = {}
+        error_patterns = Counter()
         for failure in failures:
-            error_msg = failure.get("error_message", "").lower()
-            if "assertion" in error_msg:
-                error_patterns["assertion_errors"] = error_patterns.get("assertion_errors", 0) + 1
-            elif "type" in error_msg:
-                error_patterns["type_errors"] = error_patterns.get("type_errors", 0) + 1
+            match = _ERR_CLASS_RE.search(failure.get("error_message", ""))
+            if match is None:
+                error_patterns["other_errors"] += 1
+            elif match.group(1):
+                error_patterns["assertion_errors"] += 1
             else:
-                error_patterns["other_errors"] = error_patterns.get("other_errors", 0) + 1
+                error_patterns["type_errors"] += 1
         
         if error_patterns:
-            most_common_error = max(error_patterns.items(), key=lambda x: x[1])
+            most_common_error = error_patterns.most_common(1)[0]
             recommendations.append(f"🔍 Most common issue: {most_common_error[0]} ({most_common_error[1]} cases)")
     
     # Performance recommendations
@@ -330,64 +423,68 @@ def _generate_recommendations(coverage_report: Dict[str, Any], test_results: Dic
     
     return recommendations
 
-def format_report_as_markdown(report: Dict[str, Any]) -> str:
-    """
-    Format the comprehensive test report as a markdown string.
-    """
-    logger.info("Formatting report as markdown")
-    
-    md = []
-    
-    # Header
-    md.append("# 🧪 Comprehensive Test Analysis Report")
-    md.append(f"*Generated at: {report.get('report_metadata', {}).get('generated_at', 'Unknown')}*")
-    md.append("")
-    
-    # Executive Summary
+def _iter_markdown_parts(report: Dict[str, Any]) -> Iterator[str]:
+    """Yield the markdown report piece by piece; concatenated, the pieces form the document."""
     summary = report["executive_summary"]
-    md.append("## 📊 Executive Summary")
-    md.append(f"- **Overall Score**: {summary['overall_score']}% ({summary['system_health']})")
-    md.append(f"- **Coverage Score**: {summary['coverage_score']}%")
-    md.append(f"- **Execution Success Rate**: {summary['execution_success_rate']}%")
-    md.append(f"- **Meets Coverage Threshold**: {'✅ Yes' if summary['meets_coverage_threshold'] else '❌ No'}")
-    md.append(f"- **Meets Execution Threshold**: {'✅ Yes' if summary['meets_execution_threshold'] else '❌ No'}")
-    md.append("")
-    
-    # Key Insights
-    md.append("## 💡 Key Insights")
+    coverage = report["detailed_metrics"]["coverage_breakdown"]
+    execution = report["detailed_metrics"]["execution_breakdown"]
+    
+    yield f"""# 🧪 Comprehensive Test Analysis Report
+*Generated at: {report.get('report_metadata', {}).get('generated_at', 'Unknown')}*
+
+## 📊 Executive Summary
+- **Overall Score**: {summary['overall_score']}% ({summary['system_health']})
+- **Coverage Score**: {summary['coverage_score']}%
+- **Execution Success Rate**: {summary['execution_success_rate']}%
+- **Meets Coverage Threshold**: {'✅ Yes' if summary['meets_coverage_threshold'] else '❌ No'}
+- **Meets Execution Threshold**: {'✅ Yes' if summary['meets_execution_threshold'] else '❌ No'}
+
+## 💡 Key Insights
+"""
     for insight in report["insights"]:
-        md.append(f"- {insight}")
-    md.append("")
+        yield f"- {insight}\n"
     
-    # Recommendations
-    md.append("## 🎯 Recommendations")
+    yield "\n## 🎯 Recommendations\n"
     for recommendation in report["recommendations"]:
-        md.append(f"- {recommendation}")
-    md.append("")
-    
-    # Detailed Metrics
-    md.append("## 📈 Detailed Metrics")
-    
-    # Coverage breakdown
-    coverage = report["detailed_metrics"]["coverage_breakdown"]
-    md.append("### Coverage Breakdown")
-    md.append(f"- **Function Coverage**: {coverage['function_coverage']}%")
-    md.append(f"- **Class Coverage**: {coverage['class_coverage']}%")
-    md.append(f"- **Method Coverage**: {coverage['method_coverage']}%")
-    md.append("")
-    
-    # Execution breakdown
-    execution = report["detailed_metrics"]["execution_breakdown"]
-    md.append("### Execution Statistics")
-    md.append(f"- **Total Executions**: {execution['total_executions']}")
-    md.append(f"- **Successful Executions**: {execution['successful_executions']}")
-    md.append(f"- **Average Execution Time**: {execution['average_execution_time']}s")
-    md.append("")
+        yield f"- {recommendation}\n"
+    
+    yield f"""
+## 📈 Detailed Metrics
+### Coverage Breakdown
+- **Function Coverage**: {coverage['function_coverage']}%
+- **Class Coverage**: {coverage['class_coverage']}%
+- **Method Coverage**: {coverage['method_coverage']}%
+
+### Execution Statistics
+- **Total Executions**: {execution['total_executions']}
+- **Successful Executions**: {execution['successful_executions']}
+- **Average Execution Time**: {execution['average_execution_time']}s
+"""
     
     if execution["failure_types"]:
-        md.append("### Failure Analysis")
+        yield "\n### Failure Analysis\n"
         for failure_type, count in execution["failure_types"].items():
-            md.append(f"- **{failure_type.replace('_', ' ').title()}**: {count} occurrences")
-        md.append("")
+            yield f"- **{failure_type.replace('_', ' ').title()}**: {count} occurrences\n"
+
+
+def format_report_as_markdown(report: Dict[str, Any]) -> str:
+    """
+    Format the comprehensive test report as a markdown string.
+    """
+    logger.info("Formatting report as markdown")
+    return "".join(_iter_markdown_parts(report))
+
+
+def write_report_markdown(report: Dict[str, Any], fp: TextIO) -> None:
+    """
+    Write the comprehensive test report as markdown to a text file object.
+    
+    The document is written incrementally, so it is never held in memory as a
+    single string.
     
-    return "\n".join(md)
+    Args:
+        report: Report produced by generate_comprehensive_report
+        fp: Writable text file object, e.g. from open(path, "w", encoding="utf-8")
+    """
+    logger.info("Writing report as markdown")
+    fp.writelines(_iter_markdown_parts(report))
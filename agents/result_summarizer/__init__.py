@@ -3,7 +3,7 @@
 This package contains the result summarizer agent and its associated tools.
 """
 
-from .agent import result_summarizer_agent, create_result_summarizer_agent
+from .agent import create_result_summarizer_agent, __getattr__
 
 __all__ = ['result_summarizer_agent', 'create_result_summarizer_agent']
 
@@ -3,12 +3,23 @@
 This agent summarizes the final test generation results for the user.
 """
 
-from google.adk.agents import LlmAgent
-from .tools import write_test_file_to_project, push_to_github
+from typing import TYPE_CHECKING
+from ..utils.lazy_agents import lazy_agent_getattr
 
+if TYPE_CHECKING:
+    from google.adk.agents import LlmAgent
+
+
+def create_result_summarizer_agent() -> "LlmAgent":
+    """
+    Creates and returns a configured Result Summarizer agent.
+
+    ADK and the tools are imported here, so importing this module stays cheap
+    until an agent is actually built.
+    """
+    from google.adk.agents import LlmAgent
+    from .tools import write_test_file_to_project, push_to_github
 
-def create_result_summarizer_agent() -> LlmAgent:
-    """Creates and returns a configured Result Summarizer agent."""
     return LlmAgent(
         name="ResultSummarizer",
         description="Summarizes the final test generation results for the user.",
@@ -30,11 +41,11 @@ LOCAL WORKFLOW (when pr_url is NOT available):
 - If `selective_test_results.status` is "PASS", your final answer MUST be only the modified Python code, enclosed in a python markdown block.
 - If `selective_test_results.status` is anything other than "PASS", respond with a message explaining that the tests could not be automatically fixed. You MUST include both the modified Python code from step 2 (in a python markdown block) and the final `{selective_test_results}` (in a json markdown block) to help the user debug manually.
 """,
+        include_contents="none",
         tools=[write_test_file_to_project, push_to_github],
         output_key="final_test_suite"
     )
 
 
-# Create the agent instance for backward compatibility
-result_summarizer_agent = create_result_summarizer_agent()
-
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, result_summarizer_agent=create_result_summarizer_agent)
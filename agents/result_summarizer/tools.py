@@ -5,9 +5,13 @@ This module contains tools for the result summarizer agent.
 
 import os
 import logging
+from typing import Set
 
 logger = logging.getLogger(__name__)
 
+# Project directories already created (or found to exist) by this process
+_KNOWN_DIRS: Set[str] = set()
+
 
 def write_test_file_to_project(test_code: str, project_directory: str, test_filename: str = "test_generated.py") -> str:
     """
@@ -24,15 +28,18 @@ def write_test_file_to_project(test_code: str, project_directory: str, test_file
     try:
         test_file_path = os.path.join(project_directory, test_filename)
 
-        # Ensure the directory exists
-        os.makedirs(project_directory, exist_ok=True)
+        # Ensure the directory exists, once per directory per process
+        if project_directory not in _KNOWN_DIRS:
+            os.makedirs(project_directory, exist_ok=True)
+            _KNOWN_DIRS.add(project_directory)
 
-        # Write the test file
-        with open(test_file_path, 'w') as f:
-            f.write(test_code)
+        # Write the test file as UTF-8 bytes through one large buffer
+        with open(test_file_path, 'wb', buffering=1 << 20) as f:
+            f.write(test_code.encode('utf-8'))
 
-        logger.info(f"Test file written to: {test_file_path}")
-        lines_written = len(test_code.split('\n'))
+        logger.info("Test file written to: %s", test_file_path)
+        # Same count as len(test_code.split('\n')) without building the list of lines
+        lines_written = test_code.count('\n') + 1
 
         return f"Test file successfully written to {test_file_path} ({lines_written} lines)"
 
@@ -58,7 +65,7 @@ def push_to_github(pr_url: str) -> str:
         # Push to GitHub
         github_push(pr_url)
 
-        logger.info(f"Successfully pushed changes to PR: {pr_url}")
+        logger.info("Successfully pushed changes to PR: %s", pr_url)
 
         return f"Successfully pushed test file to PR: {pr_url}"
 
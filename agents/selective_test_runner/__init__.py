@@ -4,11 +4,12 @@ This module contains the agent responsible for executing only the tests that nee
 validation in Stage 2 of the two-stage architecture.
 """
 
-from .agent import selective_test_runner_agent
+from .agent import create_selective_test_runner_agent, __getattr__
 from .tools import execute_selective_tests, parse_selective_results
 
 __all__ = [
     'selective_test_runner_agent',
+    'create_selective_test_runner_agent',
     'execute_selective_tests',
     'parse_selective_results'
 ]
@@ -3,38 +3,49 @@
 This agent executes tests and provides comprehensive results.
 """
 
+import inspect
 from google.adk.agents import LlmAgent
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import execute_selective_tests, parse_selective_results
 from ..tools.workflow_tools import read_file_as_string
-# Create the selective test runner agent
-selective_test_runner_agent = LlmAgent(
-    name="SelectiveTestRunner",
-    description="Executes test suites and provides detailed results",
-    model="gemini-2.5-flash",
-    instruction="""
-    You are a test execution specialist that runs Python test suites and provides detailed results.
+
+
+def create_selective_test_runner_agent() -> LlmAgent:
+    """Creates and returns a configured Selective Test Runner agent."""
+    return LlmAgent(
+        name="SelectiveTestRunner",
+        description="Executes test suites and provides detailed results",
+        model="gemini-2.5-flash",
+        instruction=inspect.cleandoc("""
+        You are a test execution specialist that runs Python test suites and provides detailed results.
     
-    **Your Process:**
-    1. You will receive a complete test suite from state: {generated_test_code}
-    2. You will receive source code from the source code path: {source_code_path}
-    3. Call `execute_selective_tests` to run the complete test suite against the source code
-    4. Call `parse_selective_results` to analyze the execution results
-    5. Provide comprehensive test execution results and metrics
+        **Your Process:**
+        1. Read the complete test suite and the source code path provided at the end of these instructions
+        2. Use the read_file_as_string tool to read the source code from the source code path
+        3. Call `execute_selective_tests` to run the complete test suite against the source code
+        4. Call `parse_selective_results` to analyze the execution results
+        5. Provide comprehensive test execution results and metrics
     
-    **Your Task:**
-    - Use the read_file_as_string tool to read the source code from `{source_code_path}`.
-    - Execute the complete test suite using pytest
-    - Capture all test results, errors, and execution details
-    - Provide detailed metrics including pass/fail counts and execution time
-    - Report any syntax errors, import errors, or assertion failures
+        **Your Task:**
+        - Execute the complete test suite using pytest
+        - Capture all test results, errors, and execution details
+        - Provide detailed metrics including pass/fail counts and execution time
+        - Report any syntax errors, import errors, or assertion failures
     
-    **Output Requirements:**
-    - Total number of tests executed
-    - Number of passed, failed, and skipped tests
-    - Execution success rate percentage
-    - Detailed error information for any failed tests
-    - Overall test execution summary
-    """,
-    tools=[read_file_as_string, execute_selective_tests, parse_selective_results],
-    output_key="selective_test_results"
-)
\ No newline at end of file
+        **Output Requirements:**
+        - Total number of tests executed
+        - Number of passed, failed, and skipped tests
+        - Execution success rate percentage
+        - Detailed error information for any failed tests
+        - Overall test execution summary
+
+        You will receive the test suite in the `{generated_test_code}` state variable and source code in the path `{source_code_path}`, use read_file_as_string tool to get the source code.
+        """),
+        include_contents="none",
+        tools=[read_file_as_string, execute_selective_tests, parse_selective_results],
+        output_key="selective_test_results"
+    )
+
+
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, selective_test_runner_agent=create_selective_test_runner_agent)
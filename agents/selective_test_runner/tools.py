@@ -4,30 +4,184 @@ This module contains tools for executing only the tests that need validation,
 while trusting already passing test results.
 """
 
+import ast
+import hashlib
+import importlib.util
 import logging
 import os
+import shutil
 import tempfile
 import subprocess
 import json
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 import sys 
+from ..utils.ast_cache import parse_source
 logger = logging.getLogger("two_stage_system")
 
+# Persistent home of the test virtual environments, one per distinct requirements set,
+# and of the pip download/wheel cache shared by all of them
+VENV_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "testmozart", "venvs")
+PIP_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "testmozart", "pip")
+
+# Packages installed into the test virtual environment: pytest always, the others
+# only when the code under test or the tests import them (top-level module -> distribution)
+_BASE_REQUIREMENTS = ("pytest",)
+_OPTIONAL_REQUIREMENTS = {
+    "sqlglot": "sqlglot",
+    "langgraph": "langgraph",
+    "pydantic": "pydantic",
+    "langchain": "langchain",
+}
+
+_VENV_BIN_DIR = "Scripts" if os.name == 'nt' else "bin"
+
+
+def _venv_python(venv_path: str) -> str:
+    """Return the Python executable of a virtual environment."""
+    return os.path.join(venv_path, _VENV_BIN_DIR, "python.exe" if os.name == 'nt' else "python")
+
+
+def _imported_modules(tree: ast.AST) -> Set[str]:
+    """Return the top-level module names imported anywhere in `tree`."""
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.partition(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.add(node.module.partition(".")[0])
+    return modules
+
+
+def _test_requirements(complete_test_suite: str, source_code: str) -> str:
+    """
+    Build the requirements text for running `complete_test_suite` against `source_code`.
+    
+    Optional packages are included only when imported by either; if either does not
+    parse, all of them are included so the run reports the real error.
+    """
+    try:
+        imported = _imported_modules(parse_source(source_code)) | _imported_modules(ast.parse(complete_test_suite))
+    except SyntaxError:
+        imported = _OPTIONAL_REQUIREMENTS.keys()
+    requirements = list(_BASE_REQUIREMENTS)
+    requirements.extend(dist for module, dist in _OPTIONAL_REQUIREMENTS.items() if module in imported)
+    return "\n".join(requirements) + "\n"
+
+
+def _install_command(python_exe: str, req_file: str) -> List[str]:
+    """
+    Build the command installing `req_file` into the environment of `python_exe`.
+    
+    uv is used when it is on PATH, for its faster resolver and shared wheel cache;
+    otherwise pip, preferring wheels and keeping its cache across environments.
+    """
+    uv_exe = shutil.which("uv")
+    if uv_exe:
+        return [uv_exe, "pip", "install", "--python", python_exe, "-r", req_file]
+    return [
+        python_exe, "-m", "pip", "install",
+        "--cache-dir", PIP_CACHE_DIR,
+        "--prefer-binary",
+        "-r", req_file
+    ]
+
+
+def _venv_usable(venv_path: str) -> bool:
+    """Whether the environment's interpreter exists and starts."""
+    python_exe = _venv_python(venv_path)
+    if not os.path.isfile(python_exe):
+        return False
+    try:
+        return subprocess.run([python_exe, "-c", "pass"], capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def _get_or_create_venv(requirements_text: str) -> str:
+    """
+    Return a virtual environment with `requirements_text` installed, creating it when needed.
+    
+    Environments live under VENV_CACHE_DIR, named by a hash of the requirements, and are
+    reused across calls and processes. A new one is built in a scratch directory and
+    renamed into place only once its packages are installed, so a partially built
+    environment is never picked up and concurrent builders cannot clobber each other.
+    The environment is checked on every call, so one that was deleted or whose
+    interpreter no longer runs (e.g. after a base Python upgrade) is rebuilt.
+    
+    Raises:
+        subprocess.CalledProcessError: If creating the environment or installing fails
+    """
+    venv_path = os.path.join(VENV_CACHE_DIR, hashlib.sha256(requirements_text.encode()).hexdigest()[:16])
+    if _venv_usable(venv_path):
+        return venv_path
+    if os.path.lexists(venv_path):
+        logger.warning("Discarding unusable test virtual environment in %s", venv_path)
+        shutil.rmtree(venv_path, ignore_errors=True)
+    
+    os.makedirs(VENV_CACHE_DIR, exist_ok=True)
+    build_path = tempfile.mkdtemp(prefix=".build-", dir=VENV_CACHE_DIR)
+    try:
+        logger.info("Creating test virtual environment in %s", venv_path)
+        # Use the currently running Python executable to create the venv
+        subprocess.run(
+            [sys.executable, "-m", "venv", build_path],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        
+        req_file = os.path.join(build_path, "requirements.txt")
+        with open(req_file, "w") as f:
+            f.write(requirements_text)
+        logger.info("Installing test dependencies...")
+        subprocess.run(
+            _install_command(_venv_python(build_path), req_file),
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        
+        try:
+            os.rename(build_path, venv_path)
+        except OSError:
+            # Another process finished the same environment first; use theirs
+            if not _venv_usable(venv_path):
+                raise
+    finally:
+        shutil.rmtree(build_path, ignore_errors=True)
+    return venv_path
+
+
+def _importable_by_current_interpreter(requirements_text: str) -> bool:
+    """Whether every package in `requirements_text` can be imported by the running interpreter."""
+    modules = {dist: module for module, dist in _OPTIONAL_REQUIREMENTS.items()}
+    return all(
+        importlib.util.find_spec(modules.get(requirement, requirement)) is not None
+        for requirement in requirements_text.split()
+    )
+
+
 def execute_selective_tests(
     complete_test_suite: str,
     source_code: str,
     tests_to_execute: Optional[List[str]] = None,
-    skip_passed_tests: bool = True
+    skip_passed_tests: bool = True,
+    isolation_required: bool = False
 ) -> Dict[str, Any]:
     """
     Execute only the tests that need validation.
     
+    Tests always run in a separate pytest process. When every package they need is
+    importable by the running interpreter, that interpreter runs them directly;
+    otherwise they run in a cached virtual environment.
+    
     Args:
         complete_test_suite: Complete test code including all tests
         source_code: Source code being tested
         tests_to_execute: Specific test names to execute (None = execute all new/failed)
         skip_passed_tests: Whether to skip tests that already passed
+        isolation_required: Always run the tests in a virtual environment
         
     Returns:
         Dictionary with selective execution results
@@ -43,83 +197,31 @@ def execute_selective_tests(
         with open(source_file, "w") as f:
             f.write(source_code)
 
-        req_file = os.path.join(temp_dir, "requirements.txt")
-
-        with open(req_file, "w") as f:
-            f.write("pytest\n")
-            f.write("sqlglot\n")
-            f.write("langgraph\n")
-            f.write("pydantic\n")
-            f.write("langchain\n")
-        # --- 2. Create a virtual environment ---
-        print("Creating virtual environment...", 2, 5)
-        venv_path = os.path.join(temp_dir, "venv")
-        try:
-            # Use the currently running Python executable to create the venv
-            subprocess.run(
-                [sys.executable, "-m", "venv", venv_path], 
-                check=True, 
-                capture_output=True,
-                text=True
-            )
-        except subprocess.CalledProcessError as e:
-            return {
-                "exit_code": e.returncode,
-                "stdout": e.stdout,
-                "stderr": f"Failed to create virtual environment:\n{e.stderr}"
-            }            
-        # --- 3. Determine platform-specific executable paths ---
-        if os.name == 'nt':  # Windows
-            bin_dir = "Scripts"
-        else:  # macOS, Linux, etc.
-            bin_dir = "bin"
-            
-        pip_exe = os.path.join(venv_path, bin_dir, "pip")
-        pytest_exe = os.path.join(venv_path, bin_dir, "pytest")
-        
-        # --- 2. Create a virtual environment ---
-        print("Creating virtual environment...", 2, 5)
-        venv_path = os.path.join(temp_dir, "venv")
-        try:
-            # Use the currently running Python executable to create the venv
-            subprocess.run(
-                [sys.executable, "-m", "venv", venv_path], 
-                check=True, 
-                capture_output=True,
-                text=True
-            )
-            
-        except subprocess.CalledProcessError as e:
-            return {
-                "exit_code": e.returncode,
-                "stdout": e.stdout,
-                "stderr": f"Failed to create virtual environment:\n{e.stderr}"
-            }
-        # --- 4. Install requirements into the venv ---
-        print("Installing test dependencies (pytest)...", 3, 5)
-        try:
-            subprocess.run(
-                [pip_exe, "install", "-r", req_file],
-                check=True,
-                capture_output=True,
-                text=True,
-                cwd=temp_dir
-            )
-        except subprocess.CalledProcessError as e:
-            return {
-                "exit_code": e.returncode,
-                "stdout": e.stdout,
-                "stderr": f"Failed to install pytest:\n{e.stderr}"
-            }   
-        # Install required packages
         # Write test code to file
         test_file = os.path.join(temp_dir, "test_selective.py")
         with open(test_file, "w") as f:
             f.write(complete_test_suite)
         
-        # Prepare pytest command
+        requirements_text = _test_requirements(complete_test_suite, source_code)
+        if not isolation_required and _importable_by_current_interpreter(requirements_text):
+            # Fast path: no environment to prepare, the running interpreter has everything
+            python_exe = sys.executable
+        else:
+            # Reuse the cached environment; only the code under test is per call
+            try:
+                venv_path = _get_or_create_venv(requirements_text)
+            except subprocess.CalledProcessError as e:
+                return {
+                    "exit_code": e.returncode,
+                    "stdout": e.stdout,
+                    "stderr": f"Failed to prepare the test virtual environment:\n{e.stderr}"
+                }
+            python_exe = _venv_python(venv_path)
+        
+        # Prepare pytest command; a separate process keeps generated code (and any
+        # hang, sys.exit or global patching in it) away from the agent server
         pytest_cmd = [
-            "python", "-m", "pytest", 
+            python_exe, "-m", "pytest", 
             test_file,
             "-v",
             "--tb=short"
@@ -3,7 +3,7 @@
 This package contains the test implementer agent and its associated tools.
 """
 
-from .agent import test_implementer_agent, create_test_implementer_agent
+from .agent import create_test_implementer_agent, __getattr__
 
 __all__ = ['test_implementer_agent', 'create_test_implementer_agent']
 
@@ -4,7 +4,9 @@ This agent translates abstract test scenarios into syntactically correct,
 idiomatic unit test code.
 """
 
+import inspect
 from google.adk.agents import LlmAgent
+from ..utils.lazy_agents import lazy_agent_getattr
 from .tools import write_test_code
 
 
@@ -14,7 +16,7 @@ def create_test_implementer_agent() -> LlmAgent:
         name="TestImplementer",
         description="Translates abstract test scenarios into syntactically correct, idiomatic unit test code.",
         model="gemini-2.5-pro",
-        instruction="""
+        instruction=inspect.cleandoc("""
         You are an expert Python developer specializing in writing high-quality, effective unit tests using the pytest framework.
         
         Your task is to convert a list of abstract test scenarios into a complete, runnable Python test file.
@@ -32,12 +34,11 @@ def create_test_implementer_agent() -> LlmAgent:
         - All test functions with proper assertions
 
         Do NOT call any function other than `write_test_code`.
-        """,
+        """),
         tools=[write_test_code],
         output_key="test_code"
     )
 
 
-# Create the agent instance for backward compatibility
-test_implementer_agent = create_test_implementer_agent()
-
+# Expose the agent instance for backward compatibility, built on first access
+__getattr__ = lazy_agent_getattr(__name__, test_implementer_agent=create_test_implementer_agent)
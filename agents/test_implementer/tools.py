@@ -1,6 +1,6 @@
 import re
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 logger = logging.getLogger("two_stage_system")
 
@@ -17,6 +17,28 @@ def _sanitize_for_function_name(description: str) -> str:
         s = 'test_' + s
     return s
 
+def _render_test_skeleton(test_scenario: Dict[str, Any]) -> Tuple[str, str]:
+    """Returns the test function name and its boilerplate code for a scenario."""
+    description = test_scenario.get('description', 'No description provided')
+    expected_outcome = test_scenario.get('expected_outcome', 'No expected outcome provided')
+
+    function_name = _sanitize_for_function_name(description)
+
+    # Create a detailed docstring from the scenario
+    docstring = f'''"""
+    Tests: {description}
+    Expected Outcome: {expected_outcome}
+    """'''
+
+    # The template for the test function. The '...' is a placeholder for the LLM.
+    code_template = f'''
+def {function_name}():
+    {docstring}
+    # TODO: Implement the test logic and assertion here.
+    ...
+'''
+    return function_name, code_template.strip()
+
 def write_test_code(test_scenario: Dict[str, Any], target_framework: str) -> str:
     """
     Creates boilerplate test code (imports, class/function signatures) based on a
@@ -40,24 +62,7 @@ def write_test_code(test_scenario: Dict[str, Any], target_framework: str) -> str
         return error_msg
 
     description = test_scenario.get('description', 'No description provided')
-    expected_outcome = test_scenario.get('expected_outcome', 'No expected outcome provided')
-
-    function_name = _sanitize_for_function_name(description)
-
-    # Create a detailed docstring from the scenario
-    docstring = f'''"""
-    Tests: {description}
-    Expected Outcome: {expected_outcome}
-    """'''
-
-    # The template for the test function. The '...' is a placeholder for the LLM.
-    code_template = f'''
-def {function_name}():
-    {docstring}
-    # TODO: Implement the test logic and assertion here.
-    ...
-'''
-    result = code_template.strip()
+    function_name, result = _render_test_skeleton(test_scenario)
     logger.info(f"write_test_code returning function: {function_name}")
     
     # Log the generated test code details (simplified)
@@ -66,3 +71,29 @@ def {function_name}():
     logger.info(f"   Scenario: {description}")
     
     return result
+
+def write_test_code_batch(test_scenarios: List[Dict[str, Any]], target_framework: str = 'pytest') -> Dict[str, str]:
+    """
+    Creates boilerplate test code for several test scenarios in one call.
+
+    Same output as calling `write_test_code` once per scenario, without a tool
+    round-trip for each one.
+
+    Args:
+        test_scenarios: A list of dictionaries, each containing 'description' and 'expected_outcome'.
+        target_framework: The testing framework to target (e.g., 'pytest').
+
+    Returns:
+        A dictionary mapping each scenario's index (as a string) to its boilerplate test code.
+    """
+    logger.info(f"write_test_code_batch called with {len(test_scenarios)} scenarios")
+
+    if target_framework.lower() != 'pytest':
+        error_msg = f"# Error: Unsupported framework '{target_framework}'. Only 'pytest' is supported."
+        logger.warning(error_msg)
+        return {str(index): error_msg for index in range(len(test_scenarios))}
+
+    return {
+        str(index): _render_test_skeleton(scenario)[1]
+        for index, scenario in enumerate(test_scenarios)
+    }
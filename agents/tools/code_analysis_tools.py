@@ -1,48 +1,50 @@
 import ast
 from typing import Any, Dict, List, Union
 
-# This class is a visitor that walks the Abstract Syntax Tree (AST) of the Python code.
-class CodeVisitor(ast.NodeVisitor):
+# This class walks the Abstract Syntax Tree (AST) of the Python code.
+class CodeVisitor:
     """
-    Visits nodes in an AST to extract information about classes and functions.
+    Walks an AST to extract information about classes and functions.
     """
     def __init__(self):
         self.structure: List[Dict[str, Any]] = []
 
-    def visit_ClassDef(self, node: ast.ClassDef):
-        """Called when the visitor finds a class definition."""
-        class_info = {
-            "type": "class",
-            "name": node.name,
-            "docstring": ast.get_docstring(node),
-            "methods": []
-        }
-        
-        # Iterate through the body of the class to find method definitions
-        for item in node.body:
-            if isinstance(item, ast.FunctionDef):
-                method_info = self._get_function_details(item)
-                class_info["methods"].append(method_info)
-        
-        self.structure.append(class_info)
-        # We don't call generic_visit here to avoid visiting methods twice.
-
-    def visit_FunctionDef(self, node: ast.FunctionDef):
+    def walk(self, tree: ast.AST):
         """
-        Called when the visitor finds a function definition at the top level.
-        It ignores methods inside classes, which are handled by visit_ClassDef.
+        Walks the tree with an explicit stack instead of recursive visitor dispatch.
+
+        Class bodies are scanned directly for methods and function bodies are not
+        entered, so only top-level functions are reported as functions. Nodes are
+        visited in source order, as a recursive ``ast.NodeVisitor`` would.
         """
-        # We check if the function's parent is a Module, which means it's a top-level function.
-        # This requires walking the tree with parent pointers or a simpler check.
-        # For simplicity here, we'll assume the main function will call this for top-level nodes.
-        # A more robust implementation would track the parent node.
-        # Let's assume the main function logic prevents double-counting for now.
-        if not any(isinstance(parent, ast.ClassDef) for parent in getattr(node, 'parents', [])):
-             func_info = self._get_function_details(node)
-             func_info["type"] = "function"
-             self.structure.append(func_info)
+        ClassDef = ast.ClassDef
+        function_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+        iter_child_nodes = ast.iter_child_nodes
+        get_function_details = self._get_function_details
+        append_structure = self.structure.append
+
+        stack = [tree]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            node = pop()
+            if isinstance(node, ClassDef):
+                append_structure({
+                    "type": "class",
+                    "name": node.name,
+                    "docstring": ast.get_docstring(node),
+                    # Only the class body is scanned for method definitions
+                    "methods": [get_function_details(item) for item in node.body if isinstance(item, function_types)]
+                })
+            elif isinstance(node, function_types):
+                func_info = get_function_details(node)
+                func_info["type"] = "function"
+                append_structure(func_info)
+            else:
+                # Reversed so the next pop continues with the first child
+                extend(reversed(list(iter_child_nodes(node))))
 
-    def _get_function_details(self, node: ast.FunctionDef) -> Dict[str, Any]:
+    def _get_function_details(self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> Dict[str, Any]:
         """Helper to extract details from any function or method node."""
         return {
             "name": node.name,
@@ -76,7 +78,7 @@ def analyze_code_structure(source_code: str, language: str) -> Dict[str, Any]:
         try:
             tree = ast.parse(source_code)
             visitor = CodeVisitor()
-            visitor.visit(tree)
+            visitor.walk(tree)
             return {"status": "success", "structure": visitor.structure}
         except SyntaxError as e:
             return {"status": "error", "message": f"Python syntax error: {e}"}
@@ -1,3 +1,4 @@
+import asyncio
 from google.adk.tools import ToolContext
 
 def exit_loop(tool_context: ToolContext):
@@ -12,4 +13,11 @@ def exit_loop(tool_context: ToolContext):
 def read_file_as_string(file_path: str) -> str:
     """Reads the content of a local file and returns it as a string."""
     with open(file_path, 'r') as file:
-        return file.read()
\ No newline at end of file
+        return file.read()
+
+async def read_files_as_strings(file_paths: list[str]) -> dict[str, str]:
+    """Reads several local files concurrently and returns their contents keyed by path."""
+    contents = await asyncio.gather(
+        *(asyncio.to_thread(read_file_as_string, file_path) for file_path in file_paths)
+    )
+    return dict(zip(file_paths, contents))
@@ -0,0 +1,25 @@
+"""Shared AST Cache
+
+Parses each Python source once so the code analyzer and the coverage analyzer
+can reuse the same tree when they run on the same file.
+"""
+
+import ast
+import functools
+
+
+@functools.lru_cache(maxsize=16)
+def parse_source(source_code: str) -> ast.Module:
+    """
+    Parses Python source code into an AST, reusing the tree for repeated sources.
+
+    Args:
+        source_code: The Python source code to parse.
+
+    Returns:
+        The parsed module. It is shared between callers and must not be modified.
+
+    Raises:
+        SyntaxError: If the source code is not valid Python.
+    """
+    return ast.parse(source_code)
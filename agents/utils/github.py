@@ -2,7 +2,6 @@ import os
 import tempfile
 import subprocess
 import json
-import urllib.request
 from urllib.parse import urlparse
 
 def get_branch_from_pr(pr_url: str) -> str:
@@ -11,6 +10,9 @@ def get_branch_from_pr(pr_url: str) -> str:
     if len(parts) < 4 or parts[-2] != "pull":
         raise ValueError("Invalid PR URL format")
     owner, repo, _, pr_number = parts
+    # Only needed for the PR lookup, so it is not loaded on package import
+    import urllib.request
+
     api_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}"
     headers = {}
     if os.getenv("GITHUB_TOKEN"):
@@ -0,0 +1,30 @@
+"""Lazy Agent Instances
+
+Helpers for exposing backward-compatible module-level agent instances that are
+only constructed the first time they are accessed.
+"""
+
+import functools
+from typing import Any, Callable
+
+
+def lazy_agent_getattr(module_name: str, **factories: Callable[[], Any]) -> Callable[[str], Any]:
+    """
+    Builds a module-level ``__getattr__`` (PEP 562) that creates each named agent once.
+
+    Args:
+        module_name: Name of the module the hook is installed in, used for error messages.
+        **factories: Mapping of attribute name to the factory that builds the agent.
+
+    Returns:
+        A ``__getattr__`` function returning the same cached instance on every access.
+    """
+    cached_factories = {name: functools.cache(factory) for name, factory in factories.items()}
+
+    def __getattr__(name: str) -> Any:
+        factory = cached_factories.get(name)
+        if factory is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        return factory()
+
+    return __getattr__
@@ -1,17 +1,16 @@
-import json
+import functools
+import orjson
 from google.adk.agents import LlmAgent, SequentialAgent, LoopAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.base_tool import BaseTool
-from google.genai import types
 
-# Import the individual agent instances and the new workflow tool
+# Import the individual agent instances
 from .code_analyzer import code_analyzer_agent
 from .test_case_designer import test_case_designer_agent
 from .test_implementer import test_implementer_agent
 from .test_runner import test_runner_agent
 from .debugger_and_refiner import debugger_and_refiner_agent
-from ..tools.workflow_tools import exit_loop
 
 # --- State Initialization ---
 
@@ -20,17 +19,26 @@ def initialize_state(callback_context: CallbackContext):
     user_content = callback_context.user_content
     if user_content and user_content.parts:
         try:
-            initial_data = json.loads(user_content.parts[0].text)
-            callback_context.state['source_code'] = initial_data.get('source_code')
-            callback_context.state['language'] = initial_data.get('language')
-            # Initialize test_results to ensure the final agent doesn't fail
-            # if the loop is skipped or fails early.
-            callback_context.state['test_results'] = {"status": "UNKNOWN"}
-        except (json.JSONDecodeError, AttributeError):
+            initial_data = orjson.loads(user_content.parts[0].text)
+            source_code = initial_data.get('source_code')
+            callback_context.state.update({
+                'source_code': source_code,
+                # The source never changes during a session, so its JSON encoding for
+                # the test runner prompt is computed once here.
+                '_source_code_json': _source_code_to_json(source_code or ''),
+                'language': initial_data.get('language'),
+                # Initialize test_results to ensure the final agent doesn't fail
+                # if the loop is skipped or fails early.
+                'test_results': {"status": "UNKNOWN"},
+            })
+        except (orjson.JSONDecodeError, AttributeError):
             print("Warning: Could not parse initial JSON request. Treating content as raw source code.")
-            callback_context.state['source_code'] = user_content.parts[0].text
-            callback_context.state['language'] = 'python'
-            callback_context.state['test_results'] = {"status": "UNKNOWN"}
+            callback_context.state.update({
+                'source_code': user_content.parts[0].text,
+                '_source_code_json': _source_code_to_json(user_content.parts[0].text),
+                'language': 'python',
+                'test_results': {"status": "UNKNOWN"},
+            })
 
 
 
@@ -43,9 +51,26 @@ def save_analysis_to_state(tool: BaseTool, args: dict, tool_context: ToolContext
     if tool.name == 'analyze_code_structure':
         # Save the tool's direct output to the state.
         tool_context.state['static_analysis_report'] = tool_response
-        # Return a simple content object. This signals to the ADK that the
-        # agent's turn is complete, preventing an unnecessary second LLM call.
-        return types.Content(parts=[types.Part(text="Static analysis complete.")])
+        # Skipping summarization signals to the ADK that the agent's turn is
+        # complete, preventing an unnecessary second LLM call. The returned
+        # value replaces the function response, so keep it small.
+        tool_context.actions.skip_summarization = True
+        return {"status": tool_response.get("status"), "message": "Static analysis complete."}
+
+
+def save_test_results_to_state(tool: BaseTool, args: dict, tool_context: ToolContext, tool_response: dict):
+    """
+    This callback intercepts the result from the `parse_test_results` tool,
+    saves it to the session state, and ends the test runner's turn.
+    When the tests pass it also exits the refinement loop, so the debugger is
+    never invoked just to read the PASS status and call `exit_loop`.
+    """
+    if tool.name == 'parse_test_results':
+        tool_context.state['test_results'] = tool_response
+        tool_context.actions.skip_summarization = True
+        if tool_response.get('status') == 'PASS':
+            # Same signal the `exit_loop` tool sends to the enclosing LoopAgent.
+            tool_context.actions.escalate = True
 
 
 # --- Configure Individual Agents for the Workflow ---
@@ -53,47 +78,60 @@ def save_analysis_to_state(tool: BaseTool, args: dict, tool_context: ToolContext
 # 1. CodeAnalyzer: Use the callback to save output.
 code_analyzer_agent.after_tool_callback = save_analysis_to_state
 
-# 2. TestCaseDesigner: Read from `static_analysis_report`, save to `test_scenarios`.
-test_case_designer_agent.instruction += "\n\nYou will receive the static analysis report in the `{static_analysis_report}` state variable."
-test_case_designer_agent.output_key = "test_scenarios"
+# 2. TestCaseDesigner: Reads `static_analysis_report`, saves to `test_scenarios` (set in its factory).
+
+# 3. TestImplementer: Reads `test_scenarios`, saves to `generated_test_code` (set in its factory).
 
-# 3. TestImplementer: Read from `test_scenarios`, save to `generated_test_code`.
-test_implementer_agent.instruction += "\n\nYou will receive the test scenarios in the `{test_scenarios}` state variable."
-test_implementer_agent.output_key = "generated_test_code"
+# 4. TestRunner: Read `source_code` & `generated_test_code`, save to `test_results`
+#    and exit the loop right away when the tests pass.
+# The static directives come first and never change, so the provider can reuse the
+# cached prefix on every loop iteration; only the trailing code arguments vary.
+TEST_RUNNER_SYSTEM_PROMPT = """
+You are a highly reliable test execution engine. Your task is to execute a test suite against source code.
 
-# 4. TestRunner: Read `source_code` & `generated_test_code`, save to `test_results`.
-async def build_test_runner_instruction(ctx: CallbackContext) -> str:
-    """Dynamically creates the prompt for the test runner with code from the state."""
-    source_code = ctx.state.get('source_code', '')
-    generated_code = ctx.state.get('generated_test_code', '')
+First, call the `execute_tests_sandboxed` tool with the `source_code_under_test` and `generated_test_code` string arguments given at the end of these instructions.
 
-    source_code_json_str = json.dumps(source_code)
-    generated_code_json_str = json.dumps(generated_code)
-    
-    return f"""
-    You are a highly reliable test execution engine. Your task is to execute a test suite against source code.
+Second, take the entire, raw JSON output from `execute_tests_sandboxed` and immediately pass it as the `raw_execution_output` argument to the `parse_test_results` tool.
+Your final output must be only the structured JSON object returned by the `parse_test_results` tool. Do not add any commentary or explanation.
+"""
 
-    First, call the `execute_tests_sandboxed` tool with the following two arguments:
-    - `source_code_under_test`: Set this to the string {source_code_json_str}
-    - `generated_test_code`: Set this to the string {generated_code_json_str}
+@functools.lru_cache(maxsize=32)
+def _source_code_to_json(source_code: str) -> str:
+    """JSON-encodes the source under test, which is identical on every loop iteration."""
+    return orjson.dumps(source_code).decode()
 
-    Second, take the entire, raw JSON output from `execute_tests_sandboxed` and immediately pass it as the `raw_execution_output` argument to the `parse_test_results` tool.
-    Your final output must be only the structured JSON object returned by the `parse_test_results` tool. Do not add any commentary or explanation.
-    """
+@functools.lru_cache(maxsize=32)
+def _render_test_runner_instruction(source_code_json_str: str, generated_code: str) -> str:
+    """Renders the test runner prompt; loop iterations with unchanged code reuse it."""
+    generated_code_json_str = orjson.dumps(generated_code).decode()
+
+    return f"""{TEST_RUNNER_SYSTEM_PROMPT}
+Arguments for `execute_tests_sandboxed`:
+- `source_code_under_test`: Set this to the string {source_code_json_str}
+- `generated_test_code`: Set this to the string {generated_code_json_str}
+"""
+
+def build_test_runner_instruction(ctx: CallbackContext) -> str:
+    """Appends the code under test from the state to the static test runner prompt."""
+    # The state is read-only inside instruction providers, so rendered prompts are
+    # cached here; only the generated tests change between refinement iterations.
+    source_code_json_str = ctx.state.get('_source_code_json')
+    if source_code_json_str is None:
+        source_code_json_str = _source_code_to_json(ctx.state.get('source_code') or '')
+    return _render_test_runner_instruction(
+        source_code_json_str,
+        ctx.state.get('generated_test_code') or '',
+    )
 test_runner_agent.instruction = build_test_runner_instruction
-test_runner_agent.output_key = "test_results"
+# The parsed results are stored by the callback; an output_key would overwrite
+# them with the (empty) text of the final function response event.
+test_runner_agent.after_tool_callback = save_test_results_to_state
 
 
 # 5. DebuggerAndRefiner: Read all context, save corrected code back to `generated_test_code`.
-debugger_and_refiner_agent.tools.append(exit_loop)
 debugger_and_refiner_agent.instruction = """
 You are an expert Senior Software Debugging Engineer. Your sole purpose is to analyze a failed test run and fix the generated test code.
 
-You have access to the following information from the shared state:
-- `{static_analysis_report}`: A JSON report describing the original source code's structure.
-- `{generated_test_code}`: The full Python test code that failed. This is the code you must fix.
-- `{test_results}`: A structured JSON report from the test runner, detailing the failure.
-
 Your task is to meticulously analyze the `test_results`. If the `status` is "PASS", your job is done and you MUST call the `exit_loop` tool immediately.
 
 If the `status` is "FAIL", you must rewrite the `generated_test_code` to fix the errors identified in the `test_results`.
@@ -103,6 +141,11 @@ If the `status` is "FAIL", you must rewrite the `generated_test_code` to fix the
 - If tests failed, your output MUST be only the complete, corrected Python test code.
 - Ensure the corrected code includes the necessary imports to run, such as `import pytest` and importing the code under test from `source_to_test` (e.g., `from source_to_test import YourClass, your_function`).
 - Do NOT include any explanations, comments, or markdown formatting like ```python.
+
+You have access to the following information from the shared state:
+- `{static_analysis_report}`: A JSON report describing the original source code's structure.
+- `{generated_test_code}`: The full Python test code that failed. This is the code you must fix.
+- `{test_results}`: A structured JSON report from the test runner, detailing the failure.
 """
 debugger_and_refiner_agent.output_key = "generated_test_code"
 
@@ -1,36 +1,45 @@
 from google.adk.agents import LlmAgent
 from ..tools.test_design_tools import generate_test_scenarios
 
-test_case_designer_agent = LlmAgent(
-    name="TestCaseDesigner",
-    description="Generates comprehensive abstract test scenarios in natural language based on a code analysis report.",
-    model="gemini-2.5-pro",
-    instruction="""
-    You are an expert Senior Software Engineer in Test. Your task is to design abstract test scenarios based on a static analysis report of source code.
-    The report is provided as a JSON object in the user's message.
-    
-    Your goal is to brainstorm a comprehensive list of test scenarios for each function and method in the report.
-    Consider the following categories for your scenarios:
-    1.  **Happy Path:** Test with typical, valid inputs.
-    2.  **Edge Cases:** Test with boundary values (e.g., zero, negative numbers, empty strings, very large values).
-    3.  **Error Handling:** Test how the code handles invalid input types (e.g., passing a string to a function expecting an integer).
 
-    IMPORTANT: You MUST format your output as a plain text string. For each scenario, you must provide a 'SCENARIO' and an 'EXPECTED' outcome, separated by '---'. Do not output JSON.
-    
-    Here is an example of the required output format:
-    
-    SCENARIO: Test the 'add' method with two positive integers.
-    EXPECTED: The method should return the correct sum of the two integers.
-    ---
-    SCENARIO: Test the 'add' method with a positive integer and zero.
-    EXPECTED: The method should return the positive integer itself.
-    ---
-    SCENARIO: Test the 'greet' function with an empty string.
-    EXPECTED: The function should return 'Hello, '.
+def create_test_case_designer_agent() -> LlmAgent:
+    """Creates the test case designer, reading the analysis report from state and writing `test_scenarios`."""
+    return LlmAgent(
+        name="TestCaseDesigner",
+        description="Generates comprehensive abstract test scenarios in natural language based on a code analysis report.",
+        model="gemini-2.5-pro",
+        instruction="""
+        You are an expert Senior Software Engineer in Test. Your task is to design abstract test scenarios based on a static analysis report of source code.
+        The report is provided as a JSON object in the user's message.
+        
+        Your goal is to brainstorm a comprehensive list of test scenarios for each function and method in the report.
+        Consider the following categories for your scenarios:
+        1.  **Happy Path:** Test with typical, valid inputs.
+        2.  **Edge Cases:** Test with boundary values (e.g., zero, negative numbers, empty strings, very large values).
+        3.  **Error Handling:** Test how the code handles invalid input types (e.g., passing a string to a function expecting an integer).
 
-    After generating the natural language scenarios, you MUST call the `generate_test_scenarios` tool to structure your output.
-    """,
-    tools=[
-        generate_test_scenarios
-    ]
-)
\ No newline at end of file
+        IMPORTANT: You MUST format your output as a plain text string. For each scenario, you must provide a 'SCENARIO' and an 'EXPECTED' outcome, separated by '---'. Do not output JSON.
+        
+        Here is an example of the required output format:
+        
+        SCENARIO: Test the 'add' method with two positive integers.
+        EXPECTED: The method should return the correct sum of the two integers.
+        ---
+        SCENARIO: Test the 'add' method with a positive integer and zero.
+        EXPECTED: The method should return the positive integer itself.
+        ---
+        SCENARIO: Test the 'greet' function with an empty string.
+        EXPECTED: The function should return 'Hello, '.
+
+        After generating the natural language scenarios, you MUST call the `generate_test_scenarios` tool to structure your output.
+
+        You will receive the static analysis report in the `{static_analysis_report}` state variable.
+        """,
+        tools=[
+            generate_test_scenarios
+        ],
+        output_key="test_scenarios"
+    )
+
+
+test_case_designer_agent = create_test_case_designer_agent()
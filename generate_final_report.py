@@ -5,7 +5,7 @@ Generate a final human readable report based on the system's capabilities.
 
 import sys
 import os
-import json
+import orjson
 from datetime import datetime
 
 # Add parent directory to path
@@ -158,8 +158,8 @@ def test_is_palindrome_complex():
     os.makedirs("output", exist_ok=True)
     
     # Save JSON report
-    with open("output/final_comprehensive_report.json", "w") as f:
-        json.dump(comprehensive_report, f, indent=2)
+    with open("output/final_comprehensive_report.json", "wb") as f:
+        f.write(orjson.dumps(comprehensive_report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     # Save Markdown report
     with open("output/final_human_readable_report.md", "w") as f:
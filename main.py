@@ -1,6 +1,6 @@
 import logging
 import asyncio
-import json
+import orjson
 import os
 import re
 from datetime import datetime
@@ -390,7 +390,7 @@ async def main():
     # Create user message with the initial request
     user_message = types.Content(
         role="user",
-        parts=[types.Part(text=json.dumps(initial_request))]
+        parts=[types.Part(text=orjson.dumps(initial_request).decode())]
     )
     
     async for event in runner.run_async(
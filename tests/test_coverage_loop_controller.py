@@ -0,0 +1,59 @@
+"""Tests for the coverage loop controller's plateau detection and exit precedence."""
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from agents.config import COVERAGE_PLATEAU_WINDOW
+from agents.coverage_loop_controller.tools import _has_plateaued, should_continue_coverage_loop
+
+
+def _validation(coverage, meets_target=False):
+    return {"coverage_summary": {"overall_coverage": coverage}, "meets_target": meets_target}
+
+
+def test_has_plateaued_with_flat_window():
+    assert _has_plateaued([70.0, 70.2, 70.4])
+
+
+def test_has_plateaued_rejects_slow_climb():
+    # 1.2 points gained across the window is still progress
+    assert not _has_plateaued([70.0, 70.6, 71.2])
+
+
+def test_has_plateaued_needs_a_full_window():
+    assert not _has_plateaued([70.0] * (COVERAGE_PLATEAU_WINDOW - 1))
+
+
+def test_has_plateaued_with_two_flat_windows():
+    assert _has_plateaued([70.0, 70.0, 70.0, 70.1, 70.2, 70.3])
+
+
+def test_has_plateaued_rejects_flat_window_after_a_jump():
+    # The latest window is flat, but its median rose well above the previous window's
+    history = [60.0, 65.0, 70.0, 70.0, 70.2, 70.4]
+    assert len(history) == 2 * COVERAGE_PLATEAU_WINDOW
+    assert not _has_plateaued(history)
+
+
+def test_target_achieved_takes_precedence_over_max_iterations():
+    decision = should_continue_coverage_loop(_validation(100.0, meets_target=True), 5, max_iterations=5)
+
+    assert not decision["should_continue"]
+    assert decision["exit_type"] == "target_achieved"
+
+
+def test_max_iterations_stops_loop_below_target():
+    decision = should_continue_coverage_loop(_validation(60.0), 5, max_iterations=5)
+
+    assert not decision["should_continue"]
+    assert decision["exit_type"] == "max_iterations"
+
+
+def test_plateau_stops_loop_before_max_iterations():
+    decision = should_continue_coverage_loop(
+        _validation(60.0), 1, max_iterations=5, coverage_history=[60.0, 60.0, 60.0]
+    )
+
+    assert not decision["should_continue"]
+    assert decision["exit_type"] == "plateau"
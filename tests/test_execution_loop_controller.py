@@ -0,0 +1,98 @@
+"""Tests for the execution loop controller's success history and stagnation detection."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.sessions.state import State
+
+from agents.agent import initialize_two_stage_state
+from agents.config import EXECUTION_STAGNATION_WINDOW
+from agents.execution_loop_controller.tools import _stagnation_type, should_continue_execution_loop
+
+
+def _context(values):
+    """A callback/tool context stand-in holding real session state."""
+    return SimpleNamespace(state=State(values, {}))
+
+
+def _summary(success_rate):
+    return {"success_rate": success_rate, "total_tests": 4, "tests_needing_attention": 2}
+
+
+def test_stale_success_history_stops_the_first_iteration_without_a_reset():
+    context = _context({"exec_success_history": [[i, 50.0] for i in range(6)]})
+
+    decision = should_continue_execution_loop(_summary(50.0), 0, tool_context=context)
+
+    assert not decision["should_continue"]
+    assert decision["exit_type"] == "stagnation_combined"
+
+
+def test_new_run_does_not_inherit_previous_success_history():
+    # A finished run left a flat success history behind in the same session
+    context = _context({"exec_success_history": [[i, 50.0] for i in range(6)], "coverage_history": [80.0] * 6})
+
+    initialize_two_stage_state(context)
+
+    assert context.state["exec_success_history"] == []
+    assert context.state["coverage_history"] == []
+    decision = should_continue_execution_loop(_summary(50.0), 0, tool_context=context)
+    assert decision["should_continue"]
+    assert context.state["exec_success_history"] == [[0, 50.0]]
+
+
+def test_repeated_call_in_one_iteration_records_a_single_reading():
+    context = _context({})
+
+    for iteration in range(2):
+        # The model sometimes calls the tool twice in one turn
+        should_continue_execution_loop(_summary(50.0), iteration, tool_context=context)
+        decision = should_continue_execution_loop(_summary(50.0), iteration, tool_context=context)
+
+    assert decision["should_continue"]
+    assert context.state["exec_success_history"] == [[0, 50.0], [1, 50.0]]
+
+
+def test_stagnation_type_needs_a_full_window():
+    assert _stagnation_type([50.0] * (EXECUTION_STAGNATION_WINDOW - 1)) is None
+
+
+def test_stagnation_type_with_flat_single_window():
+    assert _stagnation_type([50.0, 50.5, 50.2]) == "stagnation"
+
+
+def test_stagnation_type_rejects_climbing_single_window():
+    assert _stagnation_type([50.0, 55.0, 60.0]) is None
+
+
+def test_stagnation_type_with_two_flat_windows():
+    history = [50.0] * (2 * EXECUTION_STAGNATION_WINDOW)
+    assert _stagnation_type(history) == "stagnation_combined"
+
+
+def test_stagnation_type_rejects_improving_median():
+    assert _stagnation_type([40.0, 40.0, 40.0, 50.0, 50.0, 50.0]) is None
+
+
+def test_stagnation_type_rejects_oscillating_window():
+    # Median unchanged, but the latest window is too noisy to call converged
+    assert _stagnation_type([50.0, 50.0, 50.0, 40.0, 60.0, 50.0]) is None
+
+
+def test_all_passed_takes_precedence_over_max_iterations():
+    summary = {"all_tests_passing": True, "success_rate": 100.0, "total_tests": 4}
+
+    decision = should_continue_execution_loop(summary, 10, max_iterations=10)
+
+    assert not decision["should_continue"]
+    assert decision["exit_type"] == "all_passed"
+
+
+def test_max_iterations_stops_failing_loop():
+    decision = should_continue_execution_loop(_summary(50.0), 10, max_iterations=10)
+
+    assert not decision["should_continue"]
+    assert decision["exit_type"] == "max_iterations"
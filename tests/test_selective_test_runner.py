@@ -0,0 +1,72 @@
+"""Tests for running generated test suites in a separate pytest process and its cached venvs."""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from agents.selective_test_runner import tools
+
+_SOURCE = "def add(a, b):\n    return a + b\n"
+
+
+def test_generated_tests_cannot_change_the_agent_process():
+    suite = (
+        "import os, sys\n"
+        "from sample_code import add\n"
+        "def test_add():\n"
+        "    assert add(2, 3) == 5\n"
+        "def test_add_wrong():\n"
+        "    os.chdir('/')\n"
+        "    sys.modules['json'] = None\n"
+        "    assert add(2, 3) == 6\n"
+    )
+    cwd = os.getcwd()
+
+    result = tools.execute_selective_tests(suite, _SOURCE)
+
+    assert result["execution_successful"]
+    assert result["json_results"]["summary"]["passed"] == 1
+    assert result["json_results"]["summary"]["failed"] == 1
+    assert os.getcwd() == cwd
+    assert sys.modules.get("json") is not None
+    assert "sample_code" not in sys.modules
+
+
+def test_hanging_tests_time_out(monkeypatch):
+    def run(cmd, **kwargs):
+        assert kwargs["timeout"] == 300
+        raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+
+    monkeypatch.setattr(tools.subprocess, "run", run)
+
+    result = tools.execute_selective_tests("def test_hang():\n    while True:\n        pass\n", _SOURCE)
+
+    assert not result["execution_successful"]
+    assert result["error"] == "Test execution timed out after 300 seconds"
+
+
+def test_deleted_venv_is_rebuilt(monkeypatch, tmp_path):
+    monkeypatch.setattr(tools, "VENV_CACHE_DIR", str(tmp_path))
+    venv_path = tools._get_or_create_venv("\n")
+
+    shutil.rmtree(venv_path)
+
+    assert tools._get_or_create_venv("\n") == venv_path
+    assert tools._venv_usable(venv_path)
+
+
+def test_venv_without_interpreter_is_rebuilt(monkeypatch, tmp_path):
+    monkeypatch.setattr(tools, "VENV_CACHE_DIR", str(tmp_path))
+    venv_path = tools._get_or_create_venv("\n")
+
+    # e.g. a leftover from an interrupted build, or a broken base Python
+    os.remove(tools._venv_python(venv_path))
+    assert os.path.isdir(venv_path)
+
+    assert tools._get_or_create_venv("\n") == venv_path
+    assert tools._venv_usable(venv_path)